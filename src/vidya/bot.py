@@ -1,15 +1,33 @@
+import asyncio
 import logging
+import math
 import os
+import time
+from collections.abc import Awaitable
 from io import BytesIO
 
 import discord
-import matplotlib.pyplot as plt
 from discord.ext import commands
 from dotenv import load_dotenv
 
-from vidya.moderation import ContentModerator
-from vidya.scraper import EbayScraperError, build_ebay_url, scrape_ebay
-from vidya.utils import ExchangeRateService, calculate_statistics
+from vidya.config import Settings
+from vidya.metrics import MetricsRegistry, registry
+from vidya.moderation import ModerationResult
+from vidya.render import RenderError, comparison_sparklines, price_sparkline
+from vidya.scraper import (
+    EbayScraperError,
+    ListingBatch,
+    build_ebay_url,
+    scrape_ebay,
+)
+from vidya.services import Services
+from vidya.utils import (
+    PriceStatistics,
+    calculate_statistics,
+    calculate_statistics_batch,
+    normalize_query,
+)
+from vidya.workers import EbayJobResult, WorkerPool
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -17,47 +35,104 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-exchange_service = ExchangeRateService()
-moderator = ContentModerator()
-intents = discord.Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-
-def create_price_visualization(prices: list[float], exchange_rate: float) -> BytesIO:
-    cad_prices = [price * exchange_rate for price in prices]
-
-    plt.figure(figsize=(10, 6))
-    plt.boxplot(cad_prices, vert=True, labels=["Prices"])
-
-    plt.scatter([1] * len(cad_prices), cad_prices, alpha=0.4, color="red", zorder=2)
-
-    plt.title("Price Distribution (CAD)")
-    plt.ylabel("Price (CAD)")
-    plt.grid(True, alpha=0.3, axis="y")
-
-    plt.xticks(rotation=0)
+settings = Settings.from_env()
+
+
+class VidyaBot(commands.AutoShardedBot):
+    def __init__(
+        self,
+        command_prefix: str,
+        intents: discord.Intents,
+        shard_count: int | None = None,
+    ) -> None:
+        super().__init__(
+            command_prefix=command_prefix, intents=intents, shard_count=shard_count
+        )
+        self._services: Services | None = None
+        self.workers: WorkerPool | None = None
+
+    @property
+    def services(self) -> Services:
+        if self._services is None:
+            raise RuntimeError("Services are not available before setup_hook runs")
+        return self._services
+
+    async def setup_hook(self) -> None:
+        services = self._services = Services.create(settings)
+        services.start()
+        if settings.worker_processes > 0:
+            self.workers = WorkerPool(
+                settings,
+                workers=settings.worker_processes,
+                health_interval=settings.worker_health_interval,
+                health_timeout=settings.worker_health_timeout,
+                drain_timeout=settings.worker_drain_timeout,
+            )
+            self.workers.start()
+            registry.gauge("vidya_worker_pending", lambda: self.workers.pending)
+            registry.gauge("vidya_workers_healthy", lambda: self.workers.healthy)
+            registry.counter(
+                "vidya_worker_restarts_total", lambda: self.workers.restarts
+            )
+        if services.metrics_server is not None:
+            await services.metrics_server.start()
+        if self.workers is not None:
+            # the listings live in the workers, so they know what is cold
+            workers = self.workers
+            services.prefetcher.start(
+                warm_query, workers.expires_in, lambda: workers.idle
+            )
+        else:
+            services.prefetcher.start(
+                warm_query,
+                services.scrape_cache.expires_in,
+                lambda: services.scheduler.idle,
+            )
 
-    ax = plt.gca()
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f"${x:,.2f}"))
+    async def close(self) -> None:
+        await super().close()
+        if self.workers is not None:
+            await self.workers.aclose()
+            self.workers = None
+        if self._services is not None:
+            await self._services.aclose()
+            self._services = None
 
-    plt.tight_layout()
 
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=300, bbox_inches="tight")
-    plt.close()
-    buffer.seek(0)
-    return buffer
+intents = discord.Intents.default()
+intents.message_content = True
+bot = VidyaBot(
+    command_prefix="!", intents=intents, shard_count=settings.shard_count or None
+)
 
 
 @bot.event
 async def on_ready() -> None:
     logger.info(f"Logged in as {bot.user}")
-    logger.info(f"Bot is ready in {len(bot.guilds)} guilds")
+    logger.info(
+        f"Bot is ready in {len(bot.guilds)} guilds across {bot.shard_count} shards"
+    )
 
 
 async def handle_moderation(ctx: commands.Context, query: str) -> bool:
-    result = await moderator.check_content(query, ctx.author.id)
+    result = await bot.services.moderator.check_content(query, ctx.author.id)
+    return await report_moderation(ctx, query, result)
+
+
+async def moderate_queries(ctx: commands.Context, queries: list[str]) -> bool:
+    moderator = bot.services.moderator
+    results = await asyncio.gather(
+        *(moderator.check_content(query, ctx.author.id) for query in queries)
+    )
+    for query, result in zip(queries, results, strict=True):
+        if not await report_moderation(ctx, query, result):
+            return False
+    return True
+
+
+async def report_moderation(
+    ctx: commands.Context, query: str, result: ModerationResult
+) -> bool:
     if not result.allowed:
         if result.message:
             await ctx.send(result.message)
@@ -69,14 +144,282 @@ async def handle_moderation(ctx: commands.Context, query: str) -> bool:
     return True
 
 
+def parse_query_options(query: str) -> tuple[str, int]:
+    tokens = query.split()
+    pages = 1
+
+    if tokens and tokens[0].startswith("--pages"):
+        option = tokens.pop(0)
+        value = option.partition("=")[2] if "=" in option else None
+        if value is None and tokens:
+            value = tokens.pop(0)
+        if not value or not value.isdigit() or int(value) < 1:
+            raise ValueError("--pages expects a positive number, e.g. --pages 3")
+        pages = min(int(value), settings.scrape_max_pages)
+
+    return " ".join(tokens), pages
+
+
+def parse_compare_queries(query: str) -> tuple[list[str], int]:
+    query, pages = parse_query_options(query)
+    unique: dict[str, str] = {}
+    for part in query.split("|"):
+        if part.strip():
+            unique.setdefault(normalize_query(part), part.strip())
+    queries = list(unique.values())
+    if len(queries) < 2:
+        raise ValueError(
+            "Give at least two queries separated by |, e.g. rtx 3080 | rtx 3090"
+        )
+    if len(queries) > settings.compare_max_queries:
+        raise ValueError(
+            f"Compare at most {settings.compare_max_queries} queries at a time."
+        )
+    return queries, pages
+
+
+async def fetch_listings(
+    services: Services, query: str, pages: int, guild_id: int | None = None
+) -> ListingBatch:
+    return await services.scrape_cache.get_or_fetch(
+        query,
+        lambda: scrape_listings(services, query, pages, guild_id),
+        pages=pages,
+    )
+
+
+async def scrape_listings(
+    services: Services, query: str, pages: int, guild_id: int | None
+) -> ListingBatch:
+    history = services.history
+    listings = await scrape_ebay(
+        query,
+        clients=services.http_clients,
+        pages=pages,
+        concurrency=settings.scrape_page_concurrency,
+        executor=services.parse_executor,
+        scheduler=services.scheduler,
+        guild_id=guild_id,
+        known=history.known_keys(query) if history else None,
+    )
+    if history is None:
+        return listings
+
+    added = history.record(query, listings)
+    logger.info(f"Recorded {added} new listings for query: {query}")
+    return history.listings(query)
+
+
+async def warm_query(query: str, pages: int) -> None:
+    if bot.workers is not None:
+        await bot.workers.submit(query, pages, refresh=True)
+        return
+    services = bot.services
+    listings = await services.scrape_cache.refresh(
+        query, lambda: scrape_listings(services, query, pages, None), pages=pages
+    )
+    if listings and not services.render.options.is_text:
+        prices = listings.prices
+        exchange_rate = await services.exchange.get_rate()
+        await services.render.render(prices, exchange_rate)
+
+
+async def cancel_tasks(*tasks: asyncio.Task | None) -> None:
+    pending = [task for task in tasks if task is not None]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+def start_speculation(
+    services: Services, query: str, pages: int, guild_id: int | None, user_id: int
+) -> tuple[asyncio.Task[ListingBatch] | None, asyncio.Task[float] | None]:
+    listings_task = rate_task = None
+    # suspended users and locally blocked queries would be denied anyway
+    if not services.moderator.could_allow(query, user_id):
+        return listings_task, rate_task
+    cache = services.scrape_cache
+    # only speculate on a fetch this command would start itself; cached or
+    # in-flight results are joined after moderation instead
+    if (
+        settings.speculative_scrape
+        and cache.expires_in(query, pages) is None
+        and not cache.fetching(query, pages)
+    ):
+        listings_task = asyncio.create_task(
+            fetch_listings(services, query, pages, guild_id)
+        )
+    if settings.speculative_exchange_rate:
+        rate_task = asyncio.create_task(services.exchange.get_rate())
+    return listings_task, rate_task
+
+
+async def discard_speculation(
+    services: Services,
+    query: str,
+    pages: int,
+    listings_task: asyncio.Task[ListingBatch] | None,
+    rate_task: asyncio.Task[float] | None,
+) -> None:
+    finished = (
+        listings_task is not None
+        and listings_task.done()
+        and not listings_task.cancelled()
+        and listings_task.exception() is None
+    )
+    await cancel_tasks(listings_task, rate_task)
+    if finished:
+        services.scrape_cache.discard(query, pages, listings_task.result())
+    elif listings_task is not None:
+        services.scrape_cache.cancel(query, pages)
+
+
+def start_worker_speculation(
+    services: Services,
+    workers: WorkerPool,
+    query: str,
+    pages: int,
+    guild_id: int | None,
+    user_id: int,
+) -> asyncio.Task[EbayJobResult] | None:
+    # the worker checks its own cache and undoes the job if it gets cancelled
+    if (
+        not settings.speculative_scrape
+        or not services.moderator.could_allow(query, user_id)
+        or workers.expires_in(query, pages) is not None
+    ):
+        return None
+    return asyncio.create_task(workers.submit(query, pages, guild_id, speculative=True))
+
+
+async def fetch_comparison(
+    services: Services, queries: list[str], pages: int, guild_id: int | None
+) -> list[ListingBatch | EbayScraperError]:
+    semaphore = asyncio.Semaphore(settings.compare_concurrency)
+
+    async def fetch(query: str) -> ListingBatch | EbayScraperError:
+        async with semaphore:
+            try:
+                # in worker mode the workers hold the whole eBay request budget
+                if bot.workers is not None:
+                    return await bot.workers.listings(query, pages, guild_id)
+                return await fetch_listings(services, query, pages, guild_id)
+            except EbayScraperError as e:
+                logger.error(f"Scraping error for query '{query}': {e}")
+                return e
+
+    return await asyncio.gather(*(fetch(query) for query in queries))
+
+
+async def render_chart(query: str, pending: Awaitable[bytes]) -> bytes | None:
+    try:
+        with registry.span("render"):
+            chart = await pending
+    except RenderError as e:
+        logger.warning(f"Chart rendering failed for query '{query}': {e}")
+        return None
+    registry.observe("vidya_payload_bytes", len(chart), kind="chart")
+    return chart
+
+
+async def send_response(
+    ctx: commands.Context, services: Services, response: str, chart: bytes | None
+) -> None:
+    with registry.span("upload"):
+        if chart is None:
+            await ctx.send(content=response)
+        else:
+            viz_file = discord.File(
+                BytesIO(chart), filename=services.render.options.filename
+            )
+            await ctx.send(content=response, file=viz_file)
+
+
+def format_comparison_response(
+    queries: list[str],
+    results: list[ListingBatch | EbayScraperError],
+    stats: list[PriceStatistics],
+) -> str:
+    width = max(len(query) for query in queries)
+    lines = [
+        f"{'query':<{width}}{'n':>6}{'low':>11}{'25th':>11}"
+        f"{'median':>11}{'75th':>11}{'high':>11}"
+    ]
+    found = iter(stats)
+    for query, result in zip(queries, results, strict=True):
+        if isinstance(result, EbayScraperError):
+            lines.append(f"{query:<{width}}  scrape failed")
+        elif not result:
+            lines.append(f"{query:<{width}}  no listings")
+        else:
+            row = next(found)
+            prices = (
+                row.min_price,
+                row.q1_price,
+                row.median_price,
+                row.q3_price,
+                row.max_price,
+            )
+            lines.append(
+                f"{query:<{width}}{row.total_listings:>6}"
+                + "".join(f"{f'${price:,.2f}':>11}" for price in prices)
+            )
+    links = "\n".join(f"🔗 {query}: <{build_ebay_url(query)}>" for query in queries)
+    table = "\n".join(lines)
+    return f"**eBay Comparison (CAD):**\n```\n{table}\n```\n{links}"
+
+
+def format_stats_response(query: str, url: str, stats: PriceStatistics) -> str:
+    response = (
+        f"**{query} eBay Stats:**\n"
+        f"**URL:** {url}\n"
+        f"📊 **Price Statistics (CAD)**\n"
+        f"📉 Lowest: ${stats.min_price:.2f}\n"
+        f"🔹 25th Percentile: ${stats.q1_price:.2f}\n"
+        f"📊 Median: ${stats.median_price:.2f}\n"
+        f"🔹 75th Percentile: ${stats.q3_price:.2f}\n"
+        f"📈 Highest: ${stats.max_price:.2f}\n"
+        f"🔢 Total Listings: {stats.total_listings}"
+    )
+    if stats.outliers_removed:
+        response += f"\n✂️ Outliers Removed: {stats.outliers_removed}"
+    return response
+
+
 @bot.command(name="ebay")
 async def ebay_command(ctx: commands.Context, *, query: str) -> None:
+    try:
+        query, pages = parse_query_options(query)
+    except ValueError as e:
+        await ctx.send(f"❌ {e}")
+        return
+
     if not query.strip():
         await ctx.send("❌ Please provide a search query.")
         return
 
-    if not await handle_moderation(ctx, query):
+    if bot.workers is not None:
+        await ebay_worker_command(ctx, bot.workers, query, pages)
+        return
+
+    services = bot.services
+    started = time.perf_counter()
+    guild_id = ctx.guild.id if ctx.guild else None
+    # scraping starts while moderation runs; nothing is sent until it allows
+    listings_task, rate_task = start_speculation(
+        services, query, pages, guild_id, ctx.author.id
+    )
+    allowed = False
+    try:
+        with registry.span("moderation"):
+            allowed = await handle_moderation(ctx, query)
+    finally:
+        if not allowed:
+            await discard_speculation(services, query, pages, listings_task, rate_task)
+    if not allowed:
+        registry.inc("vidya_commands_total", outcome="denied")
         return
+    services.prefetcher.record(query, pages)
 
     async with ctx.typing():
         try:
@@ -85,34 +428,37 @@ async def ebay_command(ctx: commands.Context, *, query: str) -> None:
             )
 
             url = build_ebay_url(query)
-            listings = await scrape_ebay(query)
+            with registry.span("scrape"):
+                listings = await (
+                    listings_task or fetch_listings(services, query, pages, guild_id)
+                )
 
             if not listings:
                 await status_message.delete()
                 await ctx.send("📭 No listings found for your query.")
+                registry.inc("vidya_commands_total", outcome="empty")
                 return
 
-            prices = [listing.price for listing in listings]
-            exchange_rate = await exchange_service.get_rate()
-            stats = await calculate_statistics(prices, exchange_service)
-
-            viz_buffer = create_price_visualization(prices, exchange_rate)
-            viz_file = discord.File(viz_buffer, filename="price_distribution.png")
-
-            response = (
-                f"**{query} eBay Stats:**\n"
-                f"**URL:** {url}\n"
-                f"📊 **Price Statistics (CAD)**\n"
-                f"📉 Lowest: ${stats.min_price:.2f}\n"
-                f"🔹 25th Percentile: ${stats.q1_price:.2f}\n"
-                f"📊 Median: ${stats.median_price:.2f}\n"
-                f"🔹 75th Percentile: ${stats.q3_price:.2f}\n"
-                f"📈 Highest: ${stats.max_price:.2f}\n"
-                f"🔢 Total Listings: {stats.total_listings}"
-            )
+            prices = listings.prices
+            with registry.span("exchange_rate"):
+                exchange_rate = await (rate_task or services.exchange.get_rate())
+            with registry.span("statistics"):
+                stats = calculate_statistics(
+                    prices, exchange_rate, trim_outliers=settings.stats_trim_outliers
+                )
+
+            response = format_stats_response(query, url, stats)
+            if services.render.options.is_text:
+                response += "\n" + price_sparkline(prices, exchange_rate)
+                chart = None
+            else:
+                chart = await render_chart(
+                    query, services.render.render(prices, exchange_rate)
+                )
 
             await status_message.delete()
-            await ctx.send(content=response, file=viz_file)
+            await send_response(ctx, services, response, chart)
+            registry.inc("vidya_commands_total", outcome="ok")
             logger.info(
                 f"Successfully processed query: {query} with "
                 f"{stats.total_listings} results"
@@ -120,12 +466,205 @@ async def ebay_command(ctx: commands.Context, *, query: str) -> None:
 
         except EbayScraperError as e:
             logger.error(f"Scraping error for query '{query}': {e}")
+            registry.inc("vidya_commands_total", outcome="scrape_error")
             await ctx.send(f"❌ Error fetching eBay data: {e!s}")
         except Exception as e:
             logger.error(
                 f"Unexpected error processing query '{query}': {e}", exc_info=True
             )
+            registry.inc("vidya_commands_total", outcome="error")
             await ctx.send("❌ An unexpected error occurred. Please try again later.")
+        finally:
+            await cancel_tasks(listings_task, rate_task)
+            registry.observe(
+                "vidya_stage_seconds", time.perf_counter() - started, stage="command"
+            )
+
+
+async def ebay_worker_command(
+    ctx: commands.Context, workers: WorkerPool, query: str, pages: int
+) -> None:
+    services = bot.services
+    started = time.perf_counter()
+    guild_id = ctx.guild.id if ctx.guild else None
+    job_task = start_worker_speculation(
+        services, workers, query, pages, guild_id, ctx.author.id
+    )
+    allowed = False
+    try:
+        with registry.span("moderation"):
+            allowed = await handle_moderation(ctx, query)
+    finally:
+        if not allowed:
+            await cancel_tasks(job_task)
+    if not allowed:
+        registry.inc("vidya_commands_total", outcome="denied")
+        return
+    services.prefetcher.record(query, pages)
+
+    async with ctx.typing():
+        try:
+            status_message = await ctx.send(
+                f"🔍 Fetching completed eBay listings for: {query}..."
+            )
+            with registry.span("worker"):
+                result = await (job_task or workers.submit(query, pages, guild_id))
+
+            await status_message.delete()
+            if result.stats is None:
+                await ctx.send("📭 No listings found for your query.")
+                registry.inc("vidya_commands_total", outcome="empty")
+                return
+
+            response = format_stats_response(query, build_ebay_url(query), result.stats)
+            if result.sparkline is not None:
+                response += "\n" + result.sparkline
+            if result.chart is not None:
+                registry.observe("vidya_payload_bytes", len(result.chart), kind="chart")
+            await send_response(ctx, services, response, result.chart)
+            registry.inc("vidya_commands_total", outcome="ok")
+
+        except EbayScraperError as e:
+            logger.error(f"Scraping error for query '{query}': {e}")
+            registry.inc("vidya_commands_total", outcome="scrape_error")
+            await ctx.send(f"❌ Error fetching eBay data: {e!s}")
+        except Exception as e:
+            logger.error(
+                f"Unexpected error processing query '{query}': {e}", exc_info=True
+            )
+            registry.inc("vidya_commands_total", outcome="error")
+            await ctx.send("❌ An unexpected error occurred. Please try again later.")
+        finally:
+            await cancel_tasks(job_task)
+            registry.observe(
+                "vidya_stage_seconds", time.perf_counter() - started, stage="command"
+            )
+
+
+@bot.command(name="ebaycompare")
+async def ebaycompare_command(ctx: commands.Context, *, query: str) -> None:
+    try:
+        queries, pages = parse_compare_queries(query)
+    except ValueError as e:
+        await ctx.send(f"❌ {e}")
+        return
+
+    services = bot.services
+    started = time.perf_counter()
+    guild_id = ctx.guild.id if ctx.guild else None
+    with registry.span("moderation"):
+        allowed = await moderate_queries(ctx, queries)
+    if not allowed:
+        registry.inc("vidya_compare_commands_total", outcome="denied")
+        return
+    for item in queries:
+        services.prefetcher.record(item, pages)
+
+    async with ctx.typing():
+        rate_task = asyncio.create_task(services.exchange.get_rate())
+        try:
+            status_message = await ctx.send(
+                f"🔍 Comparing completed eBay listings for: {', '.join(queries)}..."
+            )
+            with registry.span("scrape"):
+                results = await fetch_comparison(services, queries, pages, guild_id)
+            with registry.span("exchange_rate"):
+                exchange_rate = await rate_task
+
+            await status_message.delete()
+            await send_comparison(ctx, services, queries, results, exchange_rate)
+
+        except Exception as e:
+            logger.error(
+                f"Unexpected error comparing queries {queries}: {e}", exc_info=True
+            )
+            registry.inc("vidya_compare_commands_total", outcome="error")
+            await ctx.send("❌ An unexpected error occurred. Please try again later.")
+        finally:
+            await cancel_tasks(rate_task)
+            registry.observe(
+                "vidya_stage_seconds", time.perf_counter() - started, stage="compare"
+            )
+
+
+async def send_comparison(
+    ctx: commands.Context,
+    services: Services,
+    queries: list[str],
+    results: list[ListingBatch | EbayScraperError],
+    exchange_rate: float,
+) -> None:
+    found = [
+        (query, result)
+        for query, result in zip(queries, results, strict=True)
+        if isinstance(result, ListingBatch) and result
+    ]
+    if not found:
+        failed = any(isinstance(result, EbayScraperError) for result in results)
+        registry.inc(
+            "vidya_compare_commands_total",
+            outcome="scrape_error" if failed else "empty",
+        )
+        await ctx.send(
+            "❌ Error fetching eBay data for your queries."
+            if failed
+            else "📭 No listings found for any of your queries."
+        )
+        return
+
+    # one padded pass computes every query's statistics together
+    with registry.span("statistics"):
+        stats = calculate_statistics_batch(
+            [listings.prices for _, listings in found],
+            exchange_rate,
+            trim_outliers=settings.stats_trim_outliers,
+        )
+
+    response = format_comparison_response(queries, results, stats)
+    series = [(query, listings.prices) for query, listings in found]
+    if services.render.options.is_text:
+        response += "\n" + comparison_sparklines(series, exchange_rate)
+        chart = None
+    else:
+        chart = await render_chart(
+            " | ".join(queries),
+            services.render.render_comparison(series, exchange_rate),
+        )
+
+    await send_response(ctx, services, response, chart)
+    registry.inc("vidya_compare_commands_total", outcome="ok")
+    logger.info(f"Successfully compared {len(found)} queries: {queries}")
+
+
+def format_perf_report(metrics: MetricsRegistry) -> str:
+    lines = [f"{'stage':<14}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}"]
+    for labels, histogram in sorted(metrics.histograms("vidya_stage_seconds").items()):
+        stage = dict(labels)["stage"]
+        p50, p95, p99 = (
+            "-" if math.isnan(value) else f"{value * 1000:.0f}ms"
+            for value in histogram.quantiles()
+        )
+        errors = metrics.counter_value("vidya_stage_errors_total", stage=stage)
+        lines.append(
+            f"{stage:<14}{histogram.count:>7}{p50:>9}{p95:>9}{p99:>9}{errors:>8.0f}"
+        )
+    if len(lines) == 1:
+        return "📭 No commands have been timed yet."
+    return "📈 **Stage latency**\n```\n" + "\n".join(lines) + "\n```"
+
+
+@bot.command(name="perf")
+@commands.has_permissions(administrator=True)
+async def perf_command(ctx: commands.Context) -> None:
+    await ctx.send(format_perf_report(registry))
+
+
+@perf_command.error
+async def perf_command_error(ctx: commands.Context, error: Exception) -> None:
+    if isinstance(error, commands.MissingPermissions | commands.NoPrivateMessage):
+        await ctx.send("❌ Only server administrators can use this command.")
+        return
+    raise error
 
 
 def main() -> None:
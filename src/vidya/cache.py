@@ -0,0 +1,100 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class TTLCache[K: Hashable, V]:
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, including expired ones."""
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def expires_in(self, key: K) -> float | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - self._clock()
+        return remaining if remaining > 0 else None
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def remove(self, key: K, value: V) -> bool:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] is not value:
+            return False
+        del self._entries[key]
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SingleFlight[K: Hashable, V]:
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._inflight: dict[K, asyncio.Future[V]] = {}
+        self._waiters: dict[K, int] = {}
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def active(self, key: K) -> bool:
+        return key in self._inflight
+
+    def cancel(self, key: K) -> bool:
+        future = self._inflight.get(key)
+        if future is None or key in self._waiters:
+            return False
+        return future.cancel()
@@ -0,0 +1,210 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.strip().lower() in {"1", "true", "yes", "on"} if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    render_workers: int = 2
+    render_max_pending: int = 16
+    render_timeout: float = 15.0
+    render_cache_size: int = 128
+    chart_backend: str = "matplotlib"
+    chart_format: str = "png"
+    chart_dpi: int = 300
+    http_max_connections_per_host: int = 10
+    http_max_keepalive_per_host: int = 5
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    scrape_cache_size: int = 256
+    scrape_cache_ttl: float = 300.0
+    scrape_max_pages: int = 5
+    scrape_page_concurrency: int = 3
+    compare_max_queries: int = 5
+    compare_concurrency: int = 3
+    ebay_rate_limit: float = 2.0
+    ebay_burst: int = 4
+    ebay_max_concurrency: int = 4
+    ebay_backoff_base: float = 2.0
+    ebay_backoff_max: float = 120.0
+    history_path: str | None = None
+    history_max_age: float = 30 * 86400.0
+    prefetch_top_k: int = 10
+    prefetch_budget: int = 5
+    prefetch_interval: float = 60.0
+    prefetch_half_life: float = 3600.0
+    prefetch_min_score: float = 2.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9108
+    parse_executor: str = "thread"
+    parse_workers: int = 2
+    exchange_rate_max_age: float = 3600.0
+    exchange_rate_refresh_ahead: float = 300.0
+    speculative_scrape: bool = True
+    speculative_exchange_rate: bool = True
+    stats_trim_outliers: bool = False
+    moderation_cache_size: int = 4096
+    moderation_allow_ttl: float = 86400.0
+    moderation_deny_ttl: float = 3600.0
+    moderation_cache_path: str | None = None
+    suspension_store_path: str | None = None
+    suspension_sweep_interval: float = 60.0
+    moderation_message_pool_size: int = 8
+    moderation_message_pool_low_water: int = 2
+    moderation_prefilter: bool = True
+    moderation_denylist_path: str | None = None
+    moderation_allowlist_path: str | None = None
+    moderation_reviewlist_path: str | None = None
+    moderation_batch_window: float = 0.03
+    moderation_batch_size: int = 16
+    shard_count: int = 0
+    worker_processes: int = 0
+    worker_max_jobs: int = 32
+    worker_health_interval: float = 5.0
+    worker_health_timeout: float = 15.0
+    worker_drain_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            render_workers=_env_int("VIDYA_RENDER_WORKERS", cls.render_workers),
+            render_max_pending=_env_int(
+                "VIDYA_RENDER_MAX_PENDING", cls.render_max_pending
+            ),
+            render_timeout=_env_float("VIDYA_RENDER_TIMEOUT", cls.render_timeout),
+            render_cache_size=_env_int(
+                "VIDYA_RENDER_CACHE_SIZE", cls.render_cache_size
+            ),
+            chart_backend=os.getenv("VIDYA_CHART_BACKEND") or cls.chart_backend,
+            chart_format=os.getenv("VIDYA_CHART_FORMAT") or cls.chart_format,
+            chart_dpi=_env_int("VIDYA_CHART_DPI", cls.chart_dpi),
+            http_max_connections_per_host=_env_int(
+                "VIDYA_HTTP_MAX_CONNECTIONS_PER_HOST", cls.http_max_connections_per_host
+            ),
+            http_max_keepalive_per_host=_env_int(
+                "VIDYA_HTTP_MAX_KEEPALIVE_PER_HOST", cls.http_max_keepalive_per_host
+            ),
+            http_keepalive_expiry=_env_float(
+                "VIDYA_HTTP_KEEPALIVE_EXPIRY", cls.http_keepalive_expiry
+            ),
+            http2=_env_bool("VIDYA_HTTP2", cls.http2),
+            scrape_cache_size=_env_int(
+                "VIDYA_SCRAPE_CACHE_SIZE", cls.scrape_cache_size
+            ),
+            scrape_cache_ttl=_env_float("VIDYA_SCRAPE_CACHE_TTL", cls.scrape_cache_ttl),
+            scrape_max_pages=_env_int("VIDYA_SCRAPE_MAX_PAGES", cls.scrape_max_pages),
+            scrape_page_concurrency=_env_int(
+                "VIDYA_SCRAPE_PAGE_CONCURRENCY", cls.scrape_page_concurrency
+            ),
+            compare_max_queries=_env_int(
+                "VIDYA_COMPARE_MAX_QUERIES", cls.compare_max_queries
+            ),
+            compare_concurrency=_env_int(
+                "VIDYA_COMPARE_CONCURRENCY", cls.compare_concurrency
+            ),
+            ebay_rate_limit=_env_float("VIDYA_EBAY_RATE_LIMIT", cls.ebay_rate_limit),
+            ebay_burst=_env_int("VIDYA_EBAY_BURST", cls.ebay_burst),
+            ebay_max_concurrency=_env_int(
+                "VIDYA_EBAY_MAX_CONCURRENCY", cls.ebay_max_concurrency
+            ),
+            ebay_backoff_base=_env_float(
+                "VIDYA_EBAY_BACKOFF_BASE", cls.ebay_backoff_base
+            ),
+            ebay_backoff_max=_env_float("VIDYA_EBAY_BACKOFF_MAX", cls.ebay_backoff_max),
+            history_path=os.getenv("VIDYA_HISTORY_PATH") or cls.history_path,
+            history_max_age=_env_float("VIDYA_HISTORY_MAX_AGE", cls.history_max_age),
+            prefetch_top_k=_env_int("VIDYA_PREFETCH_TOP_K", cls.prefetch_top_k),
+            prefetch_budget=_env_int("VIDYA_PREFETCH_BUDGET", cls.prefetch_budget),
+            prefetch_interval=_env_float(
+                "VIDYA_PREFETCH_INTERVAL", cls.prefetch_interval
+            ),
+            prefetch_half_life=_env_float(
+                "VIDYA_PREFETCH_HALF_LIFE", cls.prefetch_half_life
+            ),
+            prefetch_min_score=_env_float(
+                "VIDYA_PREFETCH_MIN_SCORE", cls.prefetch_min_score
+            ),
+            metrics_host=os.getenv("VIDYA_METRICS_HOST") or cls.metrics_host,
+            metrics_port=_env_int("VIDYA_METRICS_PORT", cls.metrics_port),
+            parse_executor=os.getenv("VIDYA_PARSE_EXECUTOR") or cls.parse_executor,
+            parse_workers=_env_int("VIDYA_PARSE_WORKERS", cls.parse_workers),
+            exchange_rate_max_age=_env_float(
+                "VIDYA_EXCHANGE_RATE_MAX_AGE", cls.exchange_rate_max_age
+            ),
+            exchange_rate_refresh_ahead=_env_float(
+                "VIDYA_EXCHANGE_RATE_REFRESH_AHEAD", cls.exchange_rate_refresh_ahead
+            ),
+            speculative_scrape=_env_bool(
+                "VIDYA_SPECULATIVE_SCRAPE", cls.speculative_scrape
+            ),
+            speculative_exchange_rate=_env_bool(
+                "VIDYA_SPECULATIVE_EXCHANGE_RATE", cls.speculative_exchange_rate
+            ),
+            stats_trim_outliers=_env_bool(
+                "VIDYA_STATS_TRIM_OUTLIERS", cls.stats_trim_outliers
+            ),
+            moderation_cache_size=_env_int(
+                "VIDYA_MODERATION_CACHE_SIZE", cls.moderation_cache_size
+            ),
+            moderation_allow_ttl=_env_float(
+                "VIDYA_MODERATION_ALLOW_TTL", cls.moderation_allow_ttl
+            ),
+            moderation_deny_ttl=_env_float(
+                "VIDYA_MODERATION_DENY_TTL", cls.moderation_deny_ttl
+            ),
+            moderation_cache_path=os.getenv("VIDYA_MODERATION_CACHE_PATH")
+            or cls.moderation_cache_path,
+            suspension_store_path=os.getenv("VIDYA_SUSPENSION_STORE_PATH")
+            or cls.suspension_store_path,
+            suspension_sweep_interval=_env_float(
+                "VIDYA_SUSPENSION_SWEEP_INTERVAL", cls.suspension_sweep_interval
+            ),
+            moderation_message_pool_size=_env_int(
+                "VIDYA_MODERATION_MESSAGE_POOL_SIZE", cls.moderation_message_pool_size
+            ),
+            moderation_message_pool_low_water=_env_int(
+                "VIDYA_MODERATION_MESSAGE_POOL_LOW_WATER",
+                cls.moderation_message_pool_low_water,
+            ),
+            moderation_prefilter=_env_bool(
+                "VIDYA_MODERATION_PREFILTER", cls.moderation_prefilter
+            ),
+            moderation_denylist_path=os.getenv("VIDYA_MODERATION_DENYLIST")
+            or cls.moderation_denylist_path,
+            moderation_allowlist_path=os.getenv("VIDYA_MODERATION_ALLOWLIST")
+            or cls.moderation_allowlist_path,
+            moderation_reviewlist_path=os.getenv("VIDYA_MODERATION_REVIEWLIST")
+            or cls.moderation_reviewlist_path,
+            moderation_batch_window=_env_float(
+                "VIDYA_MODERATION_BATCH_WINDOW", cls.moderation_batch_window
+            ),
+            moderation_batch_size=_env_int(
+                "VIDYA_MODERATION_BATCH_SIZE", cls.moderation_batch_size
+            ),
+            shard_count=_env_int("VIDYA_SHARD_COUNT", cls.shard_count),
+            worker_processes=_env_int("VIDYA_WORKER_PROCESSES", cls.worker_processes),
+            worker_max_jobs=_env_int("VIDYA_WORKER_MAX_JOBS", cls.worker_max_jobs),
+            worker_health_interval=_env_float(
+                "VIDYA_WORKER_HEALTH_INTERVAL", cls.worker_health_interval
+            ),
+            worker_health_timeout=_env_float(
+                "VIDYA_WORKER_HEALTH_TIMEOUT", cls.worker_health_timeout
+            ),
+            worker_drain_timeout=_env_float(
+                "VIDYA_WORKER_DRAIN_TIMEOUT", cls.worker_drain_timeout
+            ),
+        )
@@ -0,0 +1,106 @@
+import logging
+import sqlite3
+import time
+from collections.abc import Iterable
+
+from vidya.scraper import EbayListing, ListingBatch, listing_key
+from vidya.utils import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# the front end and every job worker write to the same file
+_ENABLE_WAL = "PRAGMA journal_mode = WAL"
+_SET_BUSY_TIMEOUT = "PRAGMA busy_timeout = 5000"
+_CREATE_LISTINGS_TABLE = """
+    CREATE TABLE IF NOT EXISTS listings (
+        item_key TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        price REAL NOT NULL,
+        url TEXT
+    )
+"""
+_CREATE_QUERY_LISTINGS_TABLE = """
+    CREATE TABLE IF NOT EXISTS query_listings (
+        query TEXT NOT NULL,
+        item_key TEXT NOT NULL REFERENCES listings (item_key),
+        scraped_at REAL NOT NULL,
+        PRIMARY KEY (query, item_key)
+    ) WITHOUT ROWID
+"""
+_PURGE_QUERY_LISTINGS = "DELETE FROM query_listings WHERE scraped_at <= ?"
+_PURGE_LISTINGS = """
+    DELETE FROM listings
+    WHERE item_key NOT IN (SELECT item_key FROM query_listings)
+"""
+_INSERT_LISTING = "INSERT OR IGNORE INTO listings VALUES (?, ?, ?, ?)"
+_INSERT_QUERY_LISTING = "INSERT OR IGNORE INTO query_listings VALUES (?, ?, ?)"
+_SELECT_KNOWN_KEYS = (
+    "SELECT item_key FROM query_listings WHERE query = ? AND scraped_at > ?"
+)
+_SELECT_LISTINGS = """
+    SELECT listings.title, listings.price, listings.url
+    FROM query_listings JOIN listings USING (item_key)
+    WHERE query_listings.query = ? AND query_listings.scraped_at > ?
+    ORDER BY query_listings.scraped_at DESC
+"""
+
+
+class ListingHistory:
+    def __init__(self, path: str, max_age: float = 30 * 86400.0) -> None:
+        self.max_age = max_age
+        self._db = sqlite3.connect(path)
+        self._db.execute(_SET_BUSY_TIMEOUT)
+        self._db.execute(_ENABLE_WAL)
+        self._db.execute(_CREATE_LISTINGS_TABLE)
+        self._db.execute(_CREATE_QUERY_LISTINGS_TABLE)
+        self.purge()
+
+    def known_keys(self, query: str) -> set[str]:
+        cutoff = time.time() - self.max_age
+        rows = self._db.execute(_SELECT_KNOWN_KEYS, (normalize_query(query), cutoff))
+        return {item_key for (item_key,) in rows}
+
+    def record(
+        self,
+        query: str,
+        listings: Iterable[EbayListing],
+        scraped_at: float | None = None,
+    ) -> int:
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        keyed = [
+            (item_key, listing)
+            for listing in listings
+            if (item_key := listing_key(listing)) is not None
+        ]
+        key = normalize_query(query)
+        with self._db:
+            self._db.executemany(
+                _INSERT_LISTING,
+                [
+                    (item_key, listing.title, listing.price, listing.url)
+                    for item_key, listing in keyed
+                ],
+            )
+            cursor = self._db.executemany(
+                _INSERT_QUERY_LISTING,
+                [(key, item_key, scraped_at) for item_key, _ in keyed],
+            )
+        return cursor.rowcount
+
+    def listings(self, query: str) -> ListingBatch:
+        cutoff = time.time() - self.max_age
+        rows = self._db.execute(_SELECT_LISTINGS, (normalize_query(query), cutoff))
+        columns = tuple(zip(*rows, strict=True))
+        return ListingBatch(*columns) if columns else ListingBatch()
+
+    def purge(self) -> None:
+        with self._db:
+            removed = self._db.execute(
+                _PURGE_QUERY_LISTINGS, (time.time() - self.max_age,)
+            ).rowcount
+            self._db.execute(_PURGE_LISTINGS)
+        if removed:
+            logger.info(f"Purged {removed} listings older than {self.max_age}s")
+
+    def close(self) -> None:
+        self._db.close()
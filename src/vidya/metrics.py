@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+type Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, window: int = 2048) -> None:
+        self.count = 0
+        self.total = 0.0
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self._samples.append(value)
+
+    def merge(self, other: "Histogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        self._samples.extend(other._samples)
+
+    def quantiles(self, qs: tuple[float, ...] = QUANTILES) -> list[float]:
+        # nearest-rank over the most recent window of samples
+        samples = sorted(self._samples)
+        if not samples:
+            return [math.nan for _ in qs]
+        return [samples[max(0, math.ceil(q * len(samples)) - 1)] for q in qs]
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsSnapshot:
+    counters: dict[str, dict[Labels, float]]
+    histograms: dict[str, dict[Labels, Histogram]]
+    gauges: dict[str, dict[Labels, float]]
+    read_counters: dict[str, dict[Labels, float]]
+
+
+class MetricsRegistry:
+    def __init__(self, window: int = 2048) -> None:
+        self.window = window
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._gauges: dict[str, dict[Labels, Callable[[], float]]] = {}
+        self._read_counters: dict[str, dict[Labels, Callable[[], float]]] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        if (histogram := series.get(key)) is None:
+            histogram = series[key] = Histogram(self.window)
+        histogram.observe(value)
+
+    def gauge(self, name: str, read: Callable[[], float], **labels: str) -> None:
+        self._gauges.setdefault(name, {})[_labels(labels)] = read
+
+    def counter(self, name: str, read: Callable[[], float], **labels: str) -> None:
+        # for tallies an object already keeps; read must never go down
+        self._read_counters.setdefault(name, {})[_labels(labels)] = read
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def histogram(self, name: str, **labels: str) -> Histogram | None:
+        return self._histograms.get(name, {}).get(_labels(labels))
+
+    def histograms(self, name: str) -> dict[Labels, Histogram]:
+        return dict(self._histograms.get(name, {}))
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("vidya_stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe(
+                "vidya_stage_seconds", time.perf_counter() - start, stage=stage
+            )
+
+    def collect(self) -> MetricsSnapshot:
+        # hands over everything counted since the last collect, so a process
+        # that ships its metrics elsewhere never reports the same sample twice
+        snapshot = MetricsSnapshot(
+            self._counters,
+            self._histograms,
+            {name: _read(name, series) for name, series in self._gauges.items()},
+            {name: _read(name, series) for name, series in self._read_counters.items()},
+        )
+        self._counters = {}
+        self._histograms = {}
+        return snapshot
+
+    def merge(self, snapshot: MetricsSnapshot, **labels: str) -> None:
+        # counters and histograms add up across processes, while readings
+        # taken from a process keep their own labelled series per source
+        for name, series in snapshot.counters.items():
+            for key, value in series.items():
+                self.inc(name, value, **dict(key))
+        for name, series in snapshot.histograms.items():
+            merged = self._histograms.setdefault(name, {})
+            for key, other in series.items():
+                if (histogram := merged.get(key)) is None:
+                    histogram = merged[key] = Histogram(self.window)
+                histogram.merge(other)
+        for name, series in snapshot.gauges.items():
+            for key, value in series.items():
+                self.gauge(name, lambda v=value: v, **dict(key), **labels)
+        for name, series in snapshot.read_counters.items():
+            for key, value in series.items():
+                self.counter(name, lambda v=value: v, **dict(key), **labels)
+
+    def clear(self) -> None:
+        self._counters.clear()
+        self._histograms.clear()
+        self._gauges.clear()
+        self._read_counters.clear()
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        for name in sorted(self._counters.keys() | self._read_counters.keys()):
+            values = self._counters.get(name, {}) | _read(
+                name, self._read_counters.get(name, {})
+            )
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(
+                f"{name}{_format(labels)} {value}" for labels, value in values.items()
+            )
+        for name, series in sorted(self._gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(
+                f"{name}{_format(labels)} {value}"
+                for labels, value in _read(name, series).items()
+            )
+        for name, series in sorted(self._histograms.items()):
+            lines.append(f"# TYPE {name} summary")
+            for labels, histogram in series.items():
+                for q, value in zip(QUANTILES, histogram.quantiles(), strict=True):
+                    quantile = (*labels, ("quantile", str(q)))
+                    lines.append(f"{name}{_format(quantile)} {value}")
+                lines.append(f"{name}_sum{_format(labels)} {histogram.total}")
+                lines.append(f"{name}_count{_format(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(
+        self, metrics: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108
+    ) -> None:
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        try:
+            self._server = await asyncio.start_server(
+                self._handle, self.host, self.port
+            )
+        except OSError as e:
+            logger.warning(f"Metrics endpoint disabled, cannot bind {self.port}: {e}")
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await reader.readline()).strip():
+                pass
+            method, path, *_ = request_line.decode("latin-1").split() or ("", "")
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = self.metrics.render_prometheus().encode()
+            else:
+                status = "404 Not Found"
+                body = b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (TimeoutError, ConnectionError, ValueError) as e:
+            logger.debug(f"Dropped metrics request: {e}")
+        finally:
+            writer.close()
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def _read(name: str, series: dict[Labels, Callable[[], float]]) -> dict[Labels, float]:
+    values: dict[Labels, float] = {}
+    for labels, read in series.items():
+        try:
+            values[labels] = float(read())
+        except Exception as e:
+            logger.warning(f"Failed to read metric {name}: {e}")
+    return values
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,145 @@
+import asyncio
+import heapq
+import logging
+import math
+import time
+from collections.abc import Awaitable, Callable, Hashable
+
+from vidya.utils import normalize_query
+
+logger = logging.getLogger(__name__)
+
+type PrefetchKey = tuple[str, int]
+
+
+class DecayingCounter[K: Hashable]:
+    def __init__(
+        self,
+        half_life: float = 3600.0,
+        max_keys: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self._clock = clock
+        self._counts: dict[K, tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of tracked keys."""
+        return len(self._counts)
+
+    def add(self, key: K, amount: float = 1.0) -> float:
+        now = self._clock()
+        score = self._decayed(self._counts.get(key), now) + amount
+        self._counts[key] = (score, now)
+        if len(self._counts) > self.max_keys:
+            self._prune(now)
+        return score
+
+    def score(self, key: K) -> float:
+        return self._decayed(self._counts.get(key), self._clock())
+
+    def top(self, k: int) -> list[tuple[K, float]]:
+        now = self._clock()
+        scores = (
+            (key, self._decayed(entry, now)) for key, entry in self._counts.items()
+        )
+        return heapq.nlargest(k, scores, key=lambda item: item[1])
+
+    def _decayed(self, entry: tuple[float, float] | None, now: float) -> float:
+        if entry is None:
+            return 0.0
+        score, updated = entry
+        return score * math.exp2((updated - now) / self.half_life)
+
+    def _prune(self, now: float) -> None:
+        # dropping the coldest half keeps pruning amortized O(1) per add
+        keep = heapq.nlargest(
+            self.max_keys // 2,
+            self._counts.items(),
+            key=lambda item: self._decayed(item[1], now),
+        )
+        self._counts = dict(keep)
+
+
+class QueryPrefetcher:
+    def __init__(
+        self,
+        top_k: int = 10,
+        budget: int = 5,
+        interval: float = 60.0,
+        half_life: float = 3600.0,
+        min_score: float = 2.0,
+    ) -> None:
+        self.top_k = top_k
+        self.budget = budget
+        self.interval = interval
+        self.min_score = min_score
+        self.refreshed = 0
+        self.failures = 0
+        self.counter: DecayingCounter[PrefetchKey] = DecayingCounter(half_life)
+        self._task: asyncio.Task[None] | None = None
+
+    def record(self, query: str, pages: int = 1) -> None:
+        self.counter.add((normalize_query(query), pages))
+
+    def candidates(
+        self, expires_in: Callable[[str, int], float | None]
+    ) -> list[PrefetchKey]:
+        # only entries that would go cold before the next run are worth a request
+        return [
+            key
+            for key, score in self.counter.top(self.top_k)
+            if score >= self.min_score and (expires_in(*key) or 0.0) < 2 * self.interval
+        ]
+
+    async def run_once(
+        self,
+        refresh: Callable[[str, int], Awaitable[object]],
+        expires_in: Callable[[str, int], float | None],
+        is_idle: Callable[[], bool],
+    ) -> int:
+        spent = 0
+        for query, pages in self.candidates(expires_in):
+            if spent + pages > self.budget:
+                continue
+            if not is_idle():
+                break
+            spent += pages
+            try:
+                await refresh(query, pages)
+                self.refreshed += 1
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Prefetch failed for query '{query}': {e}")
+        return spent
+
+    def start(
+        self,
+        refresh: Callable[[str, int], Awaitable[object]],
+        expires_in: Callable[[str, int], float | None],
+        is_idle: Callable[[], bool],
+    ) -> None:
+        if self.top_k <= 0 or self.budget <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._run_forever(refresh, expires_in, is_idle)
+            )
+
+    async def _run_forever(
+        self,
+        refresh: Callable[[str, int], Awaitable[object]],
+        expires_in: Callable[[str, int], float | None],
+        is_idle: Callable[[], bool],
+    ) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if spent := await self.run_once(refresh, expires_in, is_idle):
+                logger.info(f"Prefetched hot queries using {spent} requests")
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,300 @@
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+# only terms with no legitimate marketplace reading are denied outright
+DEFAULT_DENY_TERMS = (
+    "heroin",
+    "methamphetamine",
+    "fentanyl",
+    "mdma",
+    "porn",
+    "porno",
+    "dildo",
+    "cunt",
+    "fake id",
+    "ghost gun",
+    "auto sear",
+)
+
+# terms that also name ordinary listings (limited-slip "lsd" diffs, WW2
+# militaria, "Breaking Bad" merchandise) always go to the model
+DEFAULT_REVIEW_TERMS = (
+    "cocaine",
+    "meth",
+    "lsd",
+    "nazi",
+    "swastika",
+    "fuck",
+    "shit",
+)
+
+# product and brand names that anchor a local allow
+DEFAULT_ALLOW_TERMS = (
+    "nintendo",
+    "switch",
+    "gameboy",
+    "game boy",
+    "ds",
+    "3ds",
+    "wii",
+    "sony",
+    "playstation",
+    "ps1",
+    "ps2",
+    "ps3",
+    "ps4",
+    "ps5",
+    "psp",
+    "vita",
+    "microsoft",
+    "xbox",
+    "series x",
+    "series s",
+    "sega",
+    "genesis",
+    "dreamcast",
+    "steam deck",
+    "nvidia",
+    "geforce",
+    "rtx",
+    "gtx",
+    "amd",
+    "radeon",
+    "ryzen",
+    "intel",
+    "apple",
+    "iphone",
+    "ipad",
+    "macbook",
+    "airpods",
+    "samsung",
+    "galaxy",
+    "pixel",
+    "lego",
+    "pokemon",
+)
+
+# everyday words that may surround an allowed name but can't vouch for a
+# query on their own ("white power" is built from nothing but these)
+DEFAULT_GENERIC_TERMS = (
+    "oled",
+    "lite",
+    "one",
+    "rx",
+    "core",
+    "ti",
+    "super",
+    "xt",
+    "pro",
+    "max",
+    "mini",
+    "air",
+    "console",
+    "controller",
+    "graphics card",
+    "gpu",
+    "cpu",
+    "laptop",
+    "phone",
+    "headphones",
+    "camera",
+    "lens",
+    "bundle",
+    "lot",
+    "new",
+    "used",
+    "sealed",
+    "edition",
+    "disc",
+    "digital",
+    "gb",
+    "tb",
+    "black",
+    "white",
+    "card",
+    "cards",
+)
+
+# digits and symbols commonly substituted for letters
+_LEET = str.maketrans("013457@$!|", "oieastasii")
+_SEPARATORS = re.compile(r"[^a-z0-9@$!|]+")
+
+
+@dataclass
+class PrefilterResult:
+    allowed: bool
+    term: str
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[str, ...]] = [()]
+
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        if pattern not in self._output[state]:
+            self._output[state] += (pattern,)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, str]]:
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in output[state]:
+                yield index - len(pattern) + 1, pattern
+
+
+def _tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    letters: list[str] = []
+    # spaced-out words such as "p o r n" are joined back together
+    for token in _SEPARATORS.split(text.lower()):
+        if len(token) == 1:
+            letters.append(token)
+            continue
+        if letters:
+            tokens.append("".join(letters))
+            letters.clear()
+        if token:
+            tokens.append(token)
+    if letters:
+        tokens.append("".join(letters))
+    return tokens
+
+
+def _deleet(tokens: list[str]) -> list[str]:
+    return [
+        token.translate(_LEET) if any(c.isalpha() for c in token) else token
+        for token in tokens
+    ]
+
+
+def _padded(tokens: list[str]) -> str:
+    return f" {' '.join(tokens)} "
+
+
+def _term_patterns(terms: Iterable[str]) -> set[str]:
+    patterns: set[str] = set()
+    for term in terms:
+        tokens = _tokenize(term)
+        patterns.update((_padded(tokens), _padded(_deleet(tokens))))
+    return patterns
+
+
+def load_terms(path: str) -> list[str]:
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+class QueryPrefilter:
+    def __init__(
+        self,
+        deny_terms: Iterable[str] = DEFAULT_DENY_TERMS,
+        allow_terms: Iterable[str] = DEFAULT_ALLOW_TERMS,
+        review_terms: Iterable[str] = DEFAULT_REVIEW_TERMS,
+        generic_terms: Iterable[str] = DEFAULT_GENERIC_TERMS,
+    ) -> None:
+        self._deny = AhoCorasick(_term_patterns(deny_terms))
+        self._review = AhoCorasick(_term_patterns(review_terms))
+        self._allow = AhoCorasick({_padded(_tokenize(term)) for term in allow_terms})
+        self._generic = AhoCorasick(
+            {_padded(_tokenize(term)) for term in generic_terms}
+        )
+
+        self.local_allows = 0
+        self.local_denies = 0
+        self.escalations = 0
+
+    @property
+    def resolved_fraction(self) -> float:
+        resolved = self.local_allows + self.local_denies
+        total = resolved + self.escalations
+        return resolved / total if total else 0.0
+
+    def check(self, query: str) -> PrefilterResult | None:
+        tokens = _tokenize(query)
+        plain = _padded(tokens)
+        texts = (plain, _padded(_deleet(tokens)))
+
+        if (term := self._denied_term(texts)) is not None:
+            self.local_denies += 1
+            return PrefilterResult(allowed=False, term=term)
+
+        needs_review = any(
+            next(self._review.iter_matches(text), None) for text in texts
+        )
+        if tokens and not needs_review and self._is_covered(plain, tokens):
+            self.local_allows += 1
+            return PrefilterResult(allowed=True, term=plain.strip())
+
+        self.escalations += 1
+        return None
+
+    def blocks(self, query: str) -> bool:
+        # same deny check as check(), without touching the counters
+        tokens = _tokenize(query)
+        return (
+            self._denied_term((_padded(tokens), _padded(_deleet(tokens)))) is not None
+        )
+
+    def _denied_term(self, texts: Iterable[str]) -> str | None:
+        for text in texts:
+            for _, pattern in self._deny.iter_matches(text):
+                return pattern.strip()
+        return None
+
+    def _is_covered(self, text: str, tokens: list[str]) -> bool:
+        # every word must be known, and at least one of them must be a
+        # specific allow term rather than a number or a generic word
+        covered = bytearray(len(text))
+        anchors = bytearray(len(text))
+        for start, pattern in self._generic.iter_matches(text):
+            covered[start : start + len(pattern)] = b"\x01" * len(pattern)
+        for start, pattern in self._allow.iter_matches(text):
+            covered[start : start + len(pattern)] = b"\x01" * len(pattern)
+            anchors[start : start + len(pattern)] = b"\x01" * len(pattern)
+
+        anchored = False
+        position = 1
+        for token in tokens:
+            end = position + len(token)
+            if token.isdigit():
+                position = end + 1
+                continue
+            if not all(covered[position:end]):
+                return False
+            anchored = anchored or all(anchors[position:end])
+            position = end + 1
+        return anchored
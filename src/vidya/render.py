@@ -0,0 +1,568 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import math
+import multiprocessing
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RenderError(Exception):
+    pass
+
+
+class RenderTimeoutError(RenderError):
+    pass
+
+
+class RenderQueueFullError(RenderError):
+    pass
+
+
+CHART_SIZE = (10, 6)
+IMAGE_FORMATS = ("png", "palette_png", "webp")
+TEXT_BACKEND = "text"
+PALETTE_COLORS = 64
+WEBP_QUALITY = 80
+SPARK_BLOCKS = " ▁▂▃▄▅▆▇█"
+
+_BACKGROUND = (255, 255, 255)
+_FOREGROUND = (0, 0, 0)
+_GRID_COLOR = (231, 231, 231)
+_MEDIAN_COLOR = (255, 127, 14)
+_POINT_COLOR = (255, 0, 0)
+_POINT_ALPHA = 0.4
+_MAX_LABEL_LENGTH = 24
+
+type PriceSeries = tuple[str, Sequence[float]]
+
+
+class ChartRenderer(Protocol):
+    def draw(
+        self, series: Sequence[PriceSeries], exchange_rate: float, dpi: int
+    ) -> np.ndarray: ...
+
+
+@dataclass(frozen=True)
+class ChartOptions:
+    backend: str = "matplotlib"
+    image_format: str = "png"
+    dpi: int = 300
+
+    def __post_init__(self) -> None:
+        """Reject unknown backends and image formats."""
+        if self.backend != TEXT_BACKEND and self.backend not in _RENDERERS:
+            raise ValueError(f"Unknown chart backend: {self.backend}")
+        if self.image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown chart image format: {self.image_format}")
+
+    @property
+    def is_text(self) -> bool:
+        return self.backend == TEXT_BACKEND
+
+    @property
+    def filename(self) -> str:
+        extension = "webp" if self.image_format == "webp" else "png"
+        return f"price_distribution.{extension}"
+
+
+class _FigureTemplate:
+    def __init__(self) -> None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.ticker import FuncFormatter
+
+        self.figure = Figure(figsize=CHART_SIZE)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self._formatter = FuncFormatter(lambda x, p: f"${x:,.2f}")
+
+    def draw(
+        self, series: Sequence[PriceSeries], exchange_rate: float, dpi: int
+    ) -> np.ndarray:
+        import numpy as np
+
+        cad_prices = [
+            [price * exchange_rate for price in prices] for _, prices in series
+        ]
+        ax = self.ax
+        ax.clear()
+
+        ax.boxplot(cad_prices, tick_labels=[_short(label) for label, _ in series])
+        for position, values in enumerate(cad_prices, start=1):
+            ax.scatter(
+                [position] * len(values), values, alpha=0.4, color="red", zorder=2
+            )
+
+        ax.set_title("Price Distribution (CAD)")
+        ax.set_ylabel("Price (CAD)")
+        ax.grid(True, alpha=0.3, axis="y")
+        ax.yaxis.set_major_formatter(self._formatter)
+
+        self.figure.set_dpi(dpi)
+        self.figure.tight_layout()
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+
+class RasterRenderer:
+    def draw(
+        self, series: Sequence[PriceSeries], exchange_rate: float, dpi: int
+    ) -> np.ndarray:
+        import numpy as np
+
+        columns = [
+            np.asarray(prices, dtype=np.float64) * exchange_rate for _, prices in series
+        ]
+        width, height = round(CHART_SIZE[0] * dpi), round(CHART_SIZE[1] * dpi)
+        pixels = np.full((height, width, 3), _BACKGROUND, dtype=np.uint8)
+        plot = _PlotArea(
+            left=round(width * 0.12),
+            right=round(width * 0.97),
+            top=round(height * 0.08),
+            bottom=round(height * 0.88),
+            low_high=_padded_range(np.concatenate(columns)),
+            line=max(1, dpi // 100),
+        )
+
+        y_labels: list[tuple[int, str]] = []
+        for tick in _nice_ticks(*plot.low_high):
+            y = plot.to_y(tick)
+            pixels[y : y + plot.line, plot.left : plot.right] = _GRID_COLOR
+            y_labels.append((y, f"${tick:,.2f}"))
+
+        # each series gets an equal slot, like matplotlib's 0.5-wide boxes at 1..n
+        slot = (plot.right - plot.left) / len(series)
+        half = round(slot / 4)
+        x_labels: list[tuple[int, str]] = []
+        for index, ((label, _), values) in enumerate(zip(series, columns, strict=True)):
+            center = round(plot.left + (index + 0.5) * slot)
+            _draw_box(pixels, plot, values, center, half)
+            _scatter(pixels, plot, values, center, half // 2, max(1, round(dpi / 24)))
+            x_labels.append((center, _short(label)))
+        _draw_rect(pixels, plot.left, plot.top, plot.right, plot.bottom, plot.line)
+        return _draw_labels(pixels, plot, y_labels, x_labels, dpi)
+
+
+@dataclass(frozen=True)
+class _PlotArea:
+    left: int
+    right: int
+    top: int
+    bottom: int
+    low_high: tuple[float, float]
+    line: int
+
+    def to_y(self, value: float) -> int:
+        low, high = self.low_high
+        fraction = (value - low) / (high - low)
+        return round(self.bottom - fraction * (self.bottom - self.top))
+
+
+def _short(label: str) -> str:
+    if len(label) <= _MAX_LABEL_LENGTH:
+        return label
+    return label[: _MAX_LABEL_LENGTH - 1] + "…"
+
+
+def _padded_range(values: np.ndarray) -> tuple[float, float]:
+    low, high = float(values.min()), float(values.max())
+    pad = (high - low) * 0.05 or max(abs(low) * 0.05, 1.0)
+    return low - pad, high + pad
+
+
+def _nice_ticks(low: float, high: float, target: int = 6) -> list[float]:
+    raw_step = (high - low) / target
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(
+        multiple * magnitude
+        for multiple in (1, 2, 2.5, 5, 10)
+        if multiple * magnitude >= raw_step
+    )
+    first = math.ceil(low / step) * step
+    return [first + i * step for i in range(int((high - first) / step) + 1)]
+
+
+def _draw_rect(
+    pixels: np.ndarray, left: int, top: int, right: int, bottom: int, line: int
+) -> None:
+    pixels[top : top + line, left:right] = _FOREGROUND
+    pixels[bottom - line : bottom, left:right] = _FOREGROUND
+    pixels[top:bottom, left : left + line] = _FOREGROUND
+    pixels[top:bottom, right - line : right] = _FOREGROUND
+
+
+def _draw_box(
+    pixels: np.ndarray, plot: _PlotArea, values: np.ndarray, center: int, half: int
+) -> None:
+    import numpy as np
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    reach = 1.5 * (q3 - q1)
+    low_whisker = values[values >= q1 - reach].min()
+    high_whisker = values[values <= q3 + reach].max()
+    line = plot.line
+
+    box_top, box_bottom = plot.to_y(q3), plot.to_y(q1)
+    _draw_rect(pixels, center - half, box_top, center + half, box_bottom + line, line)
+    y = plot.to_y(median)
+    pixels[y : y + line, center - half : center + half] = _MEDIAN_COLOR
+
+    for whisker, end in ((high_whisker, box_top), (low_whisker, box_bottom)):
+        y = plot.to_y(whisker)
+        pixels[min(y, end) : max(y, end), center : center + line] = _FOREGROUND
+        pixels[y : y + line, center - half // 2 : center + half // 2] = _FOREGROUND
+
+
+def _box_sum(grid: np.ndarray, ry: int, rx: int) -> np.ndarray:
+    import numpy as np
+
+    # summed-area table, so every marker costs O(1) regardless of its radius
+    height, width = grid.shape
+    integral = np.pad(grid, ((ry + 1, ry), (rx + 1, rx))).cumsum(0).cumsum(1)
+    rows, cols = 2 * ry + 1, 2 * rx + 1
+    return (
+        integral[rows : rows + height, cols : cols + width]
+        - integral[:height, cols : cols + width]
+        - integral[rows : rows + height, :width]
+        + integral[:height, :width]
+    )
+
+
+def _scatter(
+    pixels: np.ndarray,
+    plot: _PlotArea,
+    values: np.ndarray,
+    center: int,
+    jitter: int,
+    radius: int,
+) -> None:
+    import numpy as np
+
+    # a fixed seed keeps the output byte-identical for the render cache
+    rng = np.random.default_rng(0)
+    band_left = center - jitter - radius
+    band = np.s_[:, band_left : center + jitter + radius + 1]
+    height, width = pixels[band].shape[:2]
+
+    low, high = plot.low_high
+    ys = plot.bottom - (values - low) / (high - low) * (plot.bottom - plot.top)
+    xs = rng.integers(-jitter, jitter + 1, size=len(values)) + center - band_left
+    index = np.clip(ys.round().astype(np.intp), 0, height - 1) * width + xs
+    centers = np.bincount(index, minlength=height * width).reshape(height, width)
+
+    # an octagon built from three boxes is close enough to a disc marker
+    diagonal = round(radius * 0.7)
+    coverage = np.maximum.reduce(
+        [
+            _box_sum(centers, radius, radius // 2),
+            _box_sum(centers, radius // 2, radius),
+            _box_sum(centers, diagonal, diagonal),
+        ]
+    )
+    alpha = (1 - (1 - _POINT_ALPHA) ** coverage)[..., None]
+    blended = pixels[band] * (1 - alpha) + np.asarray(_POINT_COLOR) * alpha
+    pixels[band] = blended.round().astype(np.uint8)
+
+
+def _draw_labels(
+    pixels: np.ndarray,
+    plot: _PlotArea,
+    y_labels: list[tuple[int, str]],
+    x_labels: list[tuple[int, str]],
+    dpi: int,
+) -> np.ndarray:
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.fromarray(pixels)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=round(dpi * 10 / 72))
+    for y, label in y_labels:
+        draw.text(
+            (plot.left - dpi // 20, y), label, fill=_FOREGROUND, font=font, anchor="rm"
+        )
+    for x, label in x_labels:
+        draw.text(
+            (x, plot.bottom + dpi // 20),
+            label,
+            fill=_FOREGROUND,
+            font=font,
+            anchor="mt",
+        )
+    title_font = ImageFont.load_default(size=round(dpi * 12 / 72))
+    draw.text(
+        ((plot.left + plot.right) // 2, plot.top // 2),
+        "Price Distribution (CAD)",
+        fill=_FOREGROUND,
+        font=title_font,
+        anchor="mm",
+    )
+    return np.asarray(image)
+
+
+_RENDERERS: dict[str, Callable[[], ChartRenderer]] = {
+    "matplotlib": _FigureTemplate,
+    "raster": RasterRenderer,
+}
+
+
+DEFAULT_CHART_OPTIONS = ChartOptions()
+
+
+def _get_renderer(backend: str) -> ChartRenderer:
+    renderers = getattr(_local, "renderers", None)
+    if renderers is None:
+        renderers = _local.renderers = {}
+    if (renderer := renderers.get(backend)) is None:
+        renderer = renderers[backend] = _RENDERERS[backend]()
+    return renderer
+
+
+def _init_worker(backend: str) -> None:
+    # raster workers never touch matplotlib, so they skip its import
+    if backend == "matplotlib":
+        import matplotlib
+
+        matplotlib.use("Agg")
+    _get_renderer(backend)
+
+
+def encode_image(pixels: np.ndarray, image_format: str = "png") -> bytes:
+    from PIL import Image
+
+    image = Image.fromarray(pixels)
+    buffer = BytesIO()
+    if image_format == "palette_png":
+        # charts use a handful of flat colours, so 64 entries lose almost nothing
+        image = image.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        image.save(buffer, format="PNG", optimize=True)
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY)
+    else:
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def create_price_visualization(
+    prices: Sequence[float],
+    exchange_rate: float,
+    options: ChartOptions = DEFAULT_CHART_OPTIONS,
+) -> bytes:
+    if options.is_text:
+        return price_sparkline(prices, exchange_rate).encode()
+    return _draw_chart([("Prices", prices)], exchange_rate, options)
+
+
+def create_comparison_visualization(
+    series: Sequence[PriceSeries],
+    exchange_rate: float,
+    options: ChartOptions = DEFAULT_CHART_OPTIONS,
+) -> bytes:
+    if options.is_text:
+        return comparison_sparklines(series, exchange_rate).encode()
+    return _draw_chart(series, exchange_rate, options)
+
+
+def _draw_chart(
+    series: Sequence[PriceSeries], exchange_rate: float, options: ChartOptions
+) -> bytes:
+    pixels = _get_renderer(options.backend).draw(series, exchange_rate, options.dpi)
+    return encode_image(pixels, options.image_format)
+
+
+def _spark_bars(
+    cad_prices: np.ndarray, bins: int, value_range: tuple[float, float] | None = None
+) -> tuple[str, np.ndarray]:
+    import numpy as np
+
+    counts, edges = np.histogram(cad_prices, bins=bins, range=value_range)
+    # any non-empty bin gets at least the lowest block so sparse tails stay visible
+    levels = np.ceil(counts / max(counts.max(), 1) * (len(SPARK_BLOCKS) - 1))
+    return "".join(SPARK_BLOCKS[level] for level in levels.astype(int)), edges
+
+
+def price_sparkline(
+    prices: Sequence[float], exchange_rate: float, bins: int = 24
+) -> str:
+    import numpy as np
+
+    cad_prices = np.asarray(prices, dtype=np.float64) * exchange_rate
+    bars, edges = _spark_bars(cad_prices, bins)
+    return f"```\n${edges[0]:,.2f} {bars} ${edges[-1]:,.2f}\n```"
+
+
+def comparison_sparklines(
+    series: Sequence[PriceSeries], exchange_rate: float, bins: int = 24
+) -> str:
+    import numpy as np
+
+    columns = [
+        np.asarray(prices, dtype=np.float64) * exchange_rate for _, prices in series
+    ]
+    # one shared scale so the rows can be compared by eye
+    everything = np.concatenate(columns)
+    value_range = (float(everything.min()), float(everything.max()))
+    labels = [_short(label) for label, _ in series]
+    width = max(map(len, labels))
+    lines = [
+        f"{label:<{width}} {_spark_bars(column, bins, value_range)[0]}"
+        for label, column in zip(labels, columns, strict=True)
+    ]
+    scale = f"{'':<{width}} ${value_range[0]:,.2f} … ${value_range[1]:,.2f}"
+    return "```\n" + "\n".join([*lines, scale]) + "\n```"
+
+
+def _price_buffer(prices: Sequence[float]) -> array:
+    # a ListingBatch already holds a float64 array, which is hashed and pickled as is
+    return prices if isinstance(prices, array) else array("d", prices)
+
+
+def _cache_key(
+    kind: bytes, series: Sequence[tuple[str, array]], exchange_rate: float
+) -> bytes:
+    digest = hashlib.blake2b(kind, digest_size=16)
+    for label, prices in series:
+        digest.update(struct.pack("qq", len(label), len(prices)))
+        digest.update(label.encode())
+        digest.update(prices)
+    digest.update(struct.pack("d", exchange_rate))
+    return digest.digest()
+
+
+class RenderService:
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 16,
+        timeout: float = 15.0,
+        cache_size: int = 128,
+        executor: Executor | None = None,
+        options: ChartOptions = DEFAULT_CHART_OPTIONS,
+    ) -> None:
+        self.options = options
+        self._workers = workers
+        self._max_pending = max_pending
+        self._timeout = timeout
+        self._cache_size = cache_size
+        self._cache: OrderedDict[bytes, bytes] = OrderedDict()
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        # text charts are cheap enough to build without a process pool
+        if self._executor is None and not self.options.is_text:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.options.backend,),
+            )
+            logger.info(f"Started render pool with {self._workers} workers")
+
+    def close(self) -> None:
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, prices: Sequence[float], exchange_rate: float) -> bytes:
+        prices = _price_buffer(prices)
+        key = _cache_key(b"price", [("", prices)], exchange_rate)
+        return await self._render(
+            key, create_price_visualization, prices, exchange_rate
+        )
+
+    async def render_comparison(
+        self, series: Sequence[PriceSeries], exchange_rate: float
+    ) -> bytes:
+        series = [(label, _price_buffer(prices)) for label, prices in series]
+        key = _cache_key(b"comparison", series, exchange_rate)
+        return await self._render(
+            key, create_comparison_visualization, series, exchange_rate
+        )
+
+    async def _render[T](
+        self,
+        key: bytes,
+        draw: Callable[[T, float, ChartOptions], bytes],
+        data: T,
+        exchange_rate: float,
+    ) -> bytes:
+        if (cached := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        if self._pending >= self._max_pending:
+            raise RenderQueueFullError(
+                f"Render queue is full ({self._max_pending} pending)"
+            )
+
+        self.start()
+        if self._executor is None:
+            # text charts are built inline, see start()
+            png = draw(data, exchange_rate, self.options)
+        else:
+            png = await self._run(draw, data, exchange_rate)
+
+        self._cache[key] = png
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return png
+
+    async def _run[T](
+        self,
+        draw: Callable[[T, float, ChartOptions], bytes],
+        data: T,
+        exchange_rate: float,
+    ) -> bytes:
+        loop = asyncio.get_running_loop()
+        try:
+            job = self._executor.submit(draw, data, exchange_rate, self.options)
+        except Exception as e:
+            raise RenderError(f"Failed to render chart: {e!s}") from e
+        # the slot is held until the pool is done with the job, not until the
+        # caller stops waiting, so timed-out renders still count against the cap
+        self._pending += 1
+        job.add_done_callback(lambda _: self._release_soon(loop))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), self._timeout)
+        except TimeoutError:
+            raise RenderTimeoutError(
+                f"Rendering did not finish within {self._timeout}s"
+            ) from None
+        except Exception as e:
+            raise RenderError(f"Failed to render chart: {e!s}") from e
+
+    def _release_soon(self, loop: asyncio.AbstractEventLoop) -> None:
+        # called from the pool's thread once the job finishes or is cancelled
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._release)
+
+    def _release(self) -> None:
+        self._pending -= 1
@@ -1,21 +1,164 @@
 import asyncio
 import logging
+import multiprocessing
+import random
+import re
+import time
+from array import array
+from collections import deque
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Container,
+    Hashable,
+    Iterable,
+    Iterator,
+    Sequence,
+)
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from itertools import accumulate
+from typing import overload
 from urllib.parse import quote_plus
 
 import httpx
-from selectolax.parser import HTMLParser, Node
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
-logger = logging.getLogger(__name__)
+from vidya.cache import SingleFlight, TTLCache
+from vidya.clients import HttpClientRegistry
+from vidya.metrics import registry
+from vidya.utils import normalize_query
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+PAGE_SIZE = 120
+# leading s-item entries on every results page that are not real listings
+_PLACEHOLDER_ITEMS = 2
+_FEWER_WORDS_MARKER = "Results matching fewer words"
+_FEWER_WORDS_SELECTOR = f':lexbor-contains("{_FEWER_WORDS_MARKER}")'
+_LISTING_FIELDS = ".s-item__title, .s-item__price, .s-item__link"
+_PRICE_SYMBOLS = str.maketrans("", "", "$,")
+# searched directly in the response bytes to avoid decoding the page
+_ROBOT_CHECK = re.compile(rb"robot check", re.IGNORECASE)
+_ITEM_ID = re.compile(r"/itm/(?:[^/?#]+/)?(\d+)")
+# the request rate never drops below this fraction of the configured rate
+_MIN_RATE_SCALE = 1 / 16
+_RATE_RAMP_STEP = 0.1
+
+
+@dataclass(slots=True)
 class EbayListing:
     title: str
     price: float
     url: str | None = None
 
 
+def _pack(strings: Sequence[str]) -> tuple[str, array]:
+    return "".join(strings), array("q", accumulate(map(len, strings), initial=0))
+
+
+def _slice_packed(
+    packed: str, offsets: array, start: int, stop: int
+) -> tuple[str, array]:
+    base = offsets[start]
+    rebased = array("q", (offset - base for offset in offsets[start : stop + 1]))
+    return packed[base : offsets[stop]], rebased
+
+
+class ListingBatch:
+    # prices live in one float64 buffer and titles and URLs in one string each,
+    # so a batch of thousands of listings is a handful of objects
+    __slots__ = ("_title_offsets", "_titles", "_url_offsets", "_urls", "prices")
+
+    def __init__(
+        self,
+        titles: Sequence[str] = (),
+        prices: Iterable[float] = (),
+        urls: Sequence[str | None] = (),
+    ) -> None:
+        self.prices = prices if isinstance(prices, array) else array("d", prices)
+        urls = urls or [None] * len(titles)
+        if not len(titles) == len(self.prices) == len(urls):
+            raise ValueError("Listing columns must have the same length")
+        self._titles, self._title_offsets = _pack(titles)
+        # a missing URL is stored as an empty string, which is never a real link
+        self._urls, self._url_offsets = _pack([url or "" for url in urls])
+
+    @classmethod
+    def from_listings(cls, listings: Iterable[EbayListing]) -> "ListingBatch":
+        if isinstance(listings, ListingBatch):
+            return listings
+        listings = list(listings)
+        return cls(
+            [listing.title for listing in listings],
+            [listing.price for listing in listings],
+            [listing.url for listing in listings],
+        )
+
+    def __len__(self) -> int:
+        """Return the number of listings."""
+        return len(self.prices)
+
+    def __iter__(self) -> Iterator[EbayListing]:
+        """Yield a listing view for each row."""
+        for index in range(len(self)):
+            yield self._view(index)
+
+    @overload
+    def __getitem__(self, index: int) -> EbayListing: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ListingBatch": ...
+
+    def __getitem__(self, index: int | slice) -> "EbayListing | ListingBatch":
+        """Return the listing at an index, or a new batch for a slice."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("ListingBatch slices do not support a step")
+            return self._slice(start, max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ListingBatch index out of range")
+        return self._view(index)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare row by row with another batch or sequence of listings."""
+        if isinstance(other, ListingBatch | Sequence):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other, strict=True)
+            )
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Return a short summary of the batch."""
+        return f"ListingBatch({len(self)} listings)"
+
+    def _view(self, index: int) -> EbayListing:
+        titles, urls = self._title_offsets, self._url_offsets
+        return EbayListing(
+            title=self._titles[titles[index] : titles[index + 1]],
+            price=self.prices[index],
+            url=self._urls[urls[index] : urls[index + 1]] or None,
+        )
+
+    def _slice(self, start: int, stop: int) -> "ListingBatch":
+        batch = ListingBatch.__new__(ListingBatch)
+        batch.prices = self.prices[start:stop]
+        batch._titles, batch._title_offsets = _slice_packed(
+            self._titles, self._title_offsets, start, stop
+        )
+        batch._urls, batch._url_offsets = _slice_packed(
+            self._urls, self._url_offsets, start, stop
+        )
+        return batch
+
+
 class EbayScraperError(Exception):
     pass
 
@@ -28,37 +171,387 @@ class ParseError(EbayScraperError):
     pass
 
 
+class RequestScheduler:
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 4,
+        max_concurrency: int = 4,
+        backoff_base: float = 2.0,
+        backoff_max: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._rate_scale = 1.0
+        self._throttle_streak = 0
+        self._open_until = 0.0
+        self._queues: dict[Hashable, deque[asyncio.Future[None]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(waiters) for waiters in self._queues.values())
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    @property
+    def circuit_open(self) -> bool:
+        return self._clock() < self._open_until
+
+    @property
+    def idle(self) -> bool:
+        return not self._queues and not self.in_flight and not self.circuit_open
+
+    @property
+    def current_rate(self) -> float:
+        return self.rate * self._rate_scale
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable = None) -> AsyncIterator[None]:
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def record_success(self) -> None:
+        self._throttle_streak = 0
+        self._rate_scale = min(1.0, self._rate_scale + _RATE_RAMP_STEP)
+
+    def record_throttle(self) -> None:
+        self.throttled += 1
+        self._throttle_streak += 1
+        self._rate_scale = max(_MIN_RATE_SCALE, self._rate_scale / 2)
+        backoff = min(
+            self.backoff_max, self.backoff_base * 2 ** (self._throttle_streak - 1)
+        )
+        backoff = random.uniform(backoff / 2, backoff)  # noqa: S311
+        self._open_until = max(self._open_until, self._clock() + backoff)
+        self._tokens = 0.0
+        logger.warning(
+            f"eBay throttled us, pausing requests for {backoff:.1f}s "
+            f"at {self.current_rate:.2f} req/s"
+        )
+
+    async def _acquire(self, key: Hashable) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(future)
+        queued_at = self._clock()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+        waited = self._clock() - queued_at
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._queues and self.in_flight < self.max_concurrency:
+            if (delay := self._delay()) > 0:
+                self._schedule(delay)
+                return
+            future = self._next_waiter()
+            if future is None:
+                return
+            self._tokens -= 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _delay(self) -> float:
+        now = self._clock()
+        if now < self._open_until:
+            return self._open_until - now
+
+        rate = self.current_rate
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / rate
+
+    def _next_waiter(self) -> asyncio.Future[None] | None:
+        # keys take turns so one busy guild cannot starve the others
+        while self._queues:
+            key = next(iter(self._queues))
+            waiters = self._queues.pop(key)
+            future = waiters.popleft()
+            if waiters:
+                self._queues[key] = waiters
+            if not future.done():
+                return future
+        return None
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+
+class ScrapeCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0) -> None:
+        self._results: TTLCache[tuple[str, int], ListingBatch] = TTLCache(maxsize, ttl)
+        self._inflight: SingleFlight[tuple[str, int], ListingBatch] = SingleFlight()
+
+    @property
+    def hits(self) -> int:
+        return self._results.hits
+
+    @property
+    def misses(self) -> int:
+        return self._results.misses
+
+    @property
+    def coalesced(self) -> int:
+        return self._inflight.coalesced
+
+    async def get_or_fetch(
+        self,
+        query: str,
+        fetch: Callable[[], Awaitable[ListingBatch]],
+        pages: int = 1,
+    ) -> ListingBatch:
+        key = (normalize_query(query), pages)
+        if (cached := self._results.get(key)) is not None:
+            return cached
+        return await self.refresh(query, fetch, pages)
+
+    async def refresh(
+        self,
+        query: str,
+        fetch: Callable[[], Awaitable[ListingBatch]],
+        pages: int = 1,
+    ) -> ListingBatch:
+        key = (normalize_query(query), pages)
+
+        async def fetch_and_store() -> ListingBatch:
+            listings = await fetch()
+            self._results.set(key, listings)
+            return listings
+
+        return await self._inflight.do(key, fetch_and_store)
+
+    def expires_in(self, query: str, pages: int = 1) -> float | None:
+        return self._results.expires_in((normalize_query(query), pages))
+
+    def fetching(self, query: str, pages: int = 1) -> bool:
+        return self._inflight.active((normalize_query(query), pages))
+
+    def cancel(self, query: str, pages: int = 1) -> bool:
+        # a fetch somebody else is still waiting on keeps running
+        return self._inflight.cancel((normalize_query(query), pages))
+
+    def discard(self, query: str, pages: int, listings: ListingBatch) -> bool:
+        # only drops the entry while it still holds the caller's own result
+        return self._results.remove((normalize_query(query), pages), listings)
+
+
 async def scrape_ebay(
-    query: str, retries: int = 3, delay: float = 1.0
-) -> list[EbayListing]:
-    url = build_ebay_url(query)
-    logger.info(f"Scraping eBay URL: {url}")
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for attempt in range(retries):
-            try:
-                response = await client.get(url)
-                response.raise_for_status()
-
-                if "robot check" in response.text.lower():
-                    raise RateLimitError("eBay robot check detected")
-
-                return await parse_ebay_listings(response.text)
-
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error occurred: {e}")
-                if attempt == retries - 1:
-                    raise EbayScraperError(
-                        f"Failed to fetch eBay data after {retries} attempts"
-                    ) from e
-                await asyncio.sleep(delay * (attempt + 1))
+    query: str,
+    retries: int = 3,
+    delay: float = 1.0,
+    clients: HttpClientRegistry | None = None,
+    pages: int = 1,
+    concurrency: int = 4,
+    executor: Executor | None = None,
+    scheduler: RequestScheduler | None = None,
+    guild_id: int | None = None,
+    known: Container[str] | None = None,
+) -> ListingBatch:
+    if clients is None:
+        async with HttpClientRegistry() as owned_clients:
+            return await scrape_ebay(
+                query,
+                retries,
+                delay,
+                owned_clients,
+                pages,
+                concurrency,
+                executor,
+                scheduler,
+                guild_id,
+                known,
+            )
+
+    async def fetch(url: str) -> tuple[ListingBatch, bool]:
+        logger.info(f"Scraping eBay URL: {url}")
+        listings = await _fetch_listings(
+            clients.get(url), url, retries, delay, executor, scheduler, guild_id
+        )
+        return until_known(listings, known)
+
+    if pages > 1:
+        return await _scrape_pages(fetch, query, pages, concurrency)
+    listings, _ = await fetch(build_ebay_url(query))
+    return listings
+
+
+async def _scrape_pages(
+    fetch: Callable[[str], Awaitable[tuple[ListingBatch, bool]]],
+    query: str,
+    pages: int,
+    concurrency: int,
+) -> ListingBatch:
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: dict[int, asyncio.Task[ListingBatch]] = {}
+    last_page = pages
+
+    async def fetch_page(page: int) -> ListingBatch:
+        nonlocal last_page
+        async with semaphore:
+            if page > last_page:
+                return ListingBatch()
+            listings, reached_known = await fetch(build_ebay_url(query, page=page))
+
+        last = reached_known or len(listings) < PAGE_SIZE - _PLACEHOLDER_ITEMS
+        if page < last_page and last:
+            last_page = page
+            for later_page, task in tasks.items():
+                if later_page > page:
+                    task.cancel()
+        return listings
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for page in range(1, pages + 1):
+                tasks[page] = group.create_task(fetch_page(page))
+    except* EbayScraperError as group_error:
+        raise group_error.exceptions[0] from None
 
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-                raise EbayScraperError(f"Unexpected error while scraping: {e!s}") from e
+    return merge_listings(
+        task.result()
+        for page, task in tasks.items()
+        if page <= last_page and not task.cancelled()
+    )
 
 
-def build_ebay_url(query: str) -> str:
+def listing_key(listing: EbayListing) -> str | None:
+    if listing.url is None:
+        return None
+    if match := _ITEM_ID.search(listing.url):
+        return match.group(1)
+    return listing.url.partition("?")[0]
+
+
+def until_known(
+    listings: ListingBatch, known: Container[str] | None
+) -> tuple[ListingBatch, bool]:
+    # results are sorted, so everything after the first known item was seen before
+    if known:
+        for index, listing in enumerate(listings):
+            if listing_key(listing) in known:
+                return listings[:index], True
+    return listings, False
+
+
+def merge_listings(pages: Iterable[ListingBatch]) -> ListingBatch:
+    titles: list[str] = []
+    prices = array("d")
+    urls: list[str | None] = []
+    seen: set[str] = set()
+    for listings in pages:
+        for listing in listings:
+            # item links carry per-request tracking parameters, so the same
+            # item on two pages only matches by its item ID
+            if (key := listing_key(listing)) is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            titles.append(listing.title)
+            prices.append(listing.price)
+            urls.append(listing.url)
+    return ListingBatch(titles, prices, urls)
+
+
+async def _fetch_listings(
+    client: httpx.AsyncClient,
+    url: str,
+    retries: int,
+    delay: float,
+    executor: Executor | None,
+    scheduler: RequestScheduler | None = None,
+    guild_id: int | None = None,
+) -> ListingBatch:
+    for attempt in range(retries):
+        try:
+            with registry.span("fetch"):
+                response = await _request(client, url, scheduler, guild_id)
+            response.raise_for_status()
+            registry.observe(
+                "vidya_payload_bytes", len(response.content), kind="ebay_page"
+            )
+            with registry.span("parse"):
+                return await parse_ebay_listings(response.content, executor)
+
+        except RateLimitError:
+            logger.warning(f"Rate limited by eBay on attempt {attempt + 1}: {url}")
+            if attempt == retries - 1:
+                raise
+            # with a scheduler the next slot already waits out the backoff
+            if scheduler is None:
+                await asyncio.sleep(delay * (attempt + 1))
+
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error occurred: {e}")
+            if attempt == retries - 1:
+                raise EbayScraperError(
+                    f"Failed to fetch eBay data after {retries} attempts"
+                ) from e
+            await asyncio.sleep(delay * (attempt + 1))
+
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            raise EbayScraperError(f"Unexpected error while scraping: {e!s}") from e
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    url: str,
+    scheduler: RequestScheduler | None,
+    guild_id: int | None,
+) -> httpx.Response:
+    if scheduler is None:
+        response = await client.get(url)
+    else:
+        async with scheduler.slot(guild_id):
+            response = await client.get(url)
+
+    throttled = response.status_code == 429 or is_robot_check(response.content)
+    if scheduler is not None:
+        if throttled:
+            scheduler.record_throttle()
+        else:
+            scheduler.record_success()
+    if throttled:
+        raise RateLimitError("eBay robot check detected")
+    return response
+
+
+def build_ebay_url(query: str, page: int = 1) -> str:
     base_url = "https://www.ebay.com/sch/i.html"
     params = {
         "_nkw": quote_plus(query),
@@ -68,49 +561,141 @@ def build_ebay_url(query: str) -> str:
         "_sop": "1",
         "_dmd": "1",
         "LH_ItemCondition": "3000",
-        "_ipg": "120",
+        "_ipg": str(PAGE_SIZE),
     }
+    if page > 1:
+        params["_pgn"] = str(page)
     return f"{base_url}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
 
 
-async def parse_ebay_listings(html_content: str) -> list[EbayListing]:
-    try:
-        if "Results matching fewer words" in html_content:
-            html_content = html_content.split("Results matching fewer words")[0]
+def is_robot_check(content: bytes) -> bool:
+    return _ROBOT_CHECK.search(content) is not None
 
-        tree = HTMLParser(html_content)
-        listings = tree.css("li.s-item")
 
-        parsed_listings: list[EbayListing] = []
+def create_parse_executor(kind: str = "thread", workers: int = 2) -> Executor:
+    if kind == "process":
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    raise ValueError(f"Unknown parse executor kind: {kind}")
 
-        for item in listings:
-            if listing := parse_listing(item):
-                parsed_listings.append(listing)
-
-        # first two listings are not relevant
-        return parsed_listings[2:]
 
+async def parse_ebay_listings(
+    html_content: str | bytes, executor: Executor | None = None
+) -> ListingBatch:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, extract_listings, html_content)
     except Exception as e:
         logger.error(f"Failed to parse HTML content: {e}")
         raise ParseError("Failed to parse eBay listings") from e
 
 
-def parse_listing(item: Node) -> EbayListing | None:
-    try:
-        title_tag = item.css_first(".s-item__title")
-        price_tag = item.css_first(".s-item__price")
-        link_tag = item.css_first(".s-item__link")
+def extract_listings(html_content: str | bytes) -> ListingBatch:
+    tree = LexborHTMLParser(html_content)
+    first_item = tree.css_first("li.s-item")
+    if first_item is None:
+        return ListingBatch()
+
+    # items are siblings in the results list; the walk ends where the
+    # "fewer words" section begins so looser matches are never parsed
+    results = first_item.parent
+    marker = _FEWER_WORDS_MARKER
+    marked = (
+        marker.encode() if isinstance(html_content, bytes) else marker
+    ) in html_content
+    titles, prices, urls, cut = _walk_results(results.child, marked)
+    if marked and not cut:
+        # the marker is not a child of the list, so compare document positions
+        stop = _fewer_words_start(tree, results)
+        if stop is not None:
+            titles, prices, urls, _ = _walk_results(results.child, stop=stop)
+
+    # first two listings are not relevant
+    skip = _PLACEHOLDER_ITEMS
+    return ListingBatch(titles[skip:], prices[skip:], urls[skip:])
+
+
+def _walk_results(
+    node: LexborNode | None, marked: bool = False, stop: int | None = None
+) -> tuple[list[str], array, list[str | None], bool]:
+    titles: list[str] = []
+    prices = array("d")
+    urls: list[str | None] = []
+    while node is not None and node.mem_id != stop:
+        # text nodes have no attributes, so the tag is checked first
+        if (
+            node.tag == "li"
+            and "s-item" in (node.attributes.get("class") or "").split()
+        ):
+            if fields := _parse_fields(node):
+                titles.append(fields[0])
+                prices.append(fields[1])
+                urls.append(fields[2])
+        elif marked and _FEWER_WORDS_MARKER in node.text():
+            return titles, prices, urls, True
+        node = node.next
+    return titles, prices, urls, False
+
+
+def _fewer_words_start(tree: LexborHTMLParser, results: LexborNode) -> int | None:
+    # returns the id of the first child of the list that follows the marker,
+    # or None when nothing does; nodes are compared by mem_id because
+    # LexborNode equality compares markup
+    if (found := tree.css_first(_FEWER_WORDS_SELECTOR)) is None:
+        return None
+
+    path = [found]
+    while (parent := path[-1].parent) is not None:
+        if parent.mem_id == results.mem_id:
+            return path[-1].mem_id
+        path.append(parent)
+
+    ancestors = [results]
+    while (parent := ancestors[-1].parent) is not None:
+        ancestors.append(parent)
+    depth = {node.mem_id: index for index, node in enumerate(ancestors)}
+    for node in path:
+        if (index := depth.get(node.parent.mem_id)) is not None:
+            branch = ancestors[index - 1].mem_id
+            # the marker's branch comes first only if the list's follows it
+            while node is not None:
+                if node.mem_id == branch:
+                    return results.child.mem_id
+                node = node.next
+            return None
+    return None
+
+
+def parse_listing(item: LexborNode) -> EbayListing | None:
+    if fields := _parse_fields(item):
+        return EbayListing(*fields)
+    return None
 
-        if not all([title_tag, price_tag]):
+
+def _parse_fields(item: LexborNode) -> tuple[str, float, str | None] | None:
+    try:
+        title_tag = price_tag = link_tag = None
+        for node in item.css(_LISTING_FIELDS):
+            classes = node.attributes.get("class") or ""
+            if title_tag is None and "s-item__title" in classes:
+                title_tag = node
+            elif price_tag is None and "s-item__price" in classes:
+                price_tag = node
+            elif link_tag is None and "s-item__link" in classes:
+                link_tag = node
+
+        if title_tag is None or price_tag is None:
             return None
 
         title = title_tag.text(strip=True)
-        price_text = price_tag.text(strip=True).replace("$", "").replace(",", "")
+        price_text = price_tag.text(strip=True).translate(_PRICE_SYMBOLS)
         url = link_tag.attributes.get("href") if link_tag else None
 
         try:
-            price = float(price_text)
-            return EbayListing(title=title, price=price, url=url)
+            return title, float(price_text), url
         except ValueError:
             logger.warning(f"Failed to parse price: {price_text} for listing: {title}")
             return None
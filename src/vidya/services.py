@@ -0,0 +1,206 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+from vidya.clients import HttpClientRegistry
+from vidya.config import Settings
+from vidya.history import ListingHistory
+from vidya.metrics import MetricsServer, registry
+from vidya.moderation import ContentModerator, SuspensionStore, VerdictCache
+from vidya.prefetch import QueryPrefetcher
+from vidya.prefilter import (
+    DEFAULT_ALLOW_TERMS,
+    DEFAULT_DENY_TERMS,
+    DEFAULT_REVIEW_TERMS,
+    QueryPrefilter,
+    load_terms,
+)
+from vidya.render import ChartOptions, RenderService
+from vidya.scraper import RequestScheduler, ScrapeCache, create_parse_executor
+from vidya.utils import ExchangeRateService
+
+
+@dataclass
+class ScrapeServices:
+    http_clients: HttpClientRegistry
+    exchange: ExchangeRateService
+    parse_executor: Executor
+    scrape_cache: ScrapeCache
+    scheduler: RequestScheduler
+    history: ListingHistory | None
+    render: RenderService
+
+    @classmethod
+    def create(
+        cls, settings: Settings, render_executor: Executor | None = None
+    ) -> "ScrapeServices":
+        http_clients = HttpClientRegistry(
+            max_connections_per_host=settings.http_max_connections_per_host,
+            max_keepalive_per_host=settings.http_max_keepalive_per_host,
+            keepalive_expiry=settings.http_keepalive_expiry,
+            http2=settings.http2,
+        )
+        return cls(
+            http_clients=http_clients,
+            exchange=ExchangeRateService(
+                http_clients,
+                max_age=settings.exchange_rate_max_age,
+                refresh_ahead=settings.exchange_rate_refresh_ahead,
+            ),
+            parse_executor=create_parse_executor(
+                settings.parse_executor, settings.parse_workers
+            ),
+            scrape_cache=ScrapeCache(
+                maxsize=settings.scrape_cache_size, ttl=settings.scrape_cache_ttl
+            ),
+            scheduler=RequestScheduler(
+                rate=settings.ebay_rate_limit,
+                burst=settings.ebay_burst,
+                max_concurrency=settings.ebay_max_concurrency,
+                backoff_base=settings.ebay_backoff_base,
+                backoff_max=settings.ebay_backoff_max,
+            ),
+            history=(
+                ListingHistory(settings.history_path, settings.history_max_age)
+                if settings.history_path
+                else None
+            ),
+            render=RenderService(
+                workers=settings.render_workers,
+                max_pending=settings.render_max_pending,
+                timeout=settings.render_timeout,
+                cache_size=settings.render_cache_size,
+                executor=render_executor,
+                options=ChartOptions(
+                    backend=settings.chart_backend,
+                    image_format=settings.chart_format,
+                    dpi=settings.chart_dpi,
+                ),
+            ),
+        )
+
+    def start(self) -> None:
+        self.render.start()
+        self._register_gauges()
+
+    def _register_gauges(self) -> None:
+        for name, cache in (("scrape", self.scrape_cache), ("render", self.render)):
+            registry.counter(
+                "vidya_cache_hits_total", lambda c=cache: c.hits, cache=name
+            )
+            registry.counter(
+                "vidya_cache_misses_total", lambda c=cache: c.misses, cache=name
+            )
+        registry.counter(
+            "vidya_scrape_coalesced_total", lambda: self.scrape_cache.coalesced
+        )
+        registry.gauge("vidya_render_pending", lambda: self.render.pending)
+        registry.gauge("vidya_ebay_queue_depth", lambda: self.scheduler.queue_depth)
+        registry.gauge("vidya_ebay_in_flight", lambda: self.scheduler.in_flight)
+        registry.counter("vidya_ebay_requests_total", lambda: self.scheduler.requests)
+        registry.counter("vidya_ebay_throttled_total", lambda: self.scheduler.throttled)
+        registry.gauge("vidya_ebay_wait_seconds_mean", lambda: self.scheduler.mean_wait)
+        registry.gauge("vidya_ebay_wait_seconds_max", lambda: self.scheduler.max_wait)
+        registry.gauge("vidya_ebay_request_rate", lambda: self.scheduler.current_rate)
+
+    async def aclose(self) -> None:
+        self.render.close()
+        self.parse_executor.shutdown(wait=False, cancel_futures=True)
+        await self.exchange.aclose()
+        if self.history is not None:
+            self.history.close()
+        await self.http_clients.aclose()
+
+
+@dataclass
+class Services(ScrapeServices):
+    moderator: ContentModerator
+    prefetcher: QueryPrefetcher
+    metrics_server: MetricsServer | None
+
+    @classmethod
+    def create(cls, settings: Settings) -> "Services":
+        # job workers build only the scrape half; the front end adds moderation
+        scrape = ScrapeServices.create(settings)
+        return cls(
+            **vars(scrape),
+            moderator=ContentModerator(
+                VerdictCache(
+                    maxsize=settings.moderation_cache_size,
+                    allow_ttl=settings.moderation_allow_ttl,
+                    deny_ttl=settings.moderation_deny_ttl,
+                    path=settings.moderation_cache_path,
+                ),
+                _create_prefilter(settings),
+                message_pool_size=settings.moderation_message_pool_size,
+                message_pool_low_water=settings.moderation_message_pool_low_water,
+                suspensions=SuspensionStore(
+                    path=settings.suspension_store_path,
+                    sweep_interval=settings.suspension_sweep_interval,
+                ),
+                batch_window=settings.moderation_batch_window,
+                batch_size=settings.moderation_batch_size,
+            ),
+            prefetcher=QueryPrefetcher(
+                top_k=settings.prefetch_top_k,
+                budget=settings.prefetch_budget,
+                interval=settings.prefetch_interval,
+                half_life=settings.prefetch_half_life,
+                min_score=settings.prefetch_min_score,
+            ),
+            metrics_server=(
+                MetricsServer(registry, settings.metrics_host, settings.metrics_port)
+                if settings.metrics_port
+                else None
+            ),
+        )
+
+    def start(self) -> None:
+        super().start()
+        self.moderator.start()
+
+    def _register_gauges(self) -> None:
+        super()._register_gauges()
+        verdicts = self.moderator.verdicts
+        if verdicts is not None:
+            registry.counter(
+                "vidya_cache_hits_total", lambda: verdicts.hits, cache="verdict"
+            )
+            registry.counter(
+                "vidya_cache_misses_total", lambda: verdicts.misses, cache="verdict"
+            )
+        registry.counter(
+            "vidya_prefetch_refreshed_total", lambda: self.prefetcher.refreshed
+        )
+        if (batcher := self.moderator.batcher) is not None:
+            registry.counter("vidya_moderation_batches_total", lambda: batcher.batches)
+            registry.counter(
+                "vidya_moderation_batched_queries_total",
+                lambda: batcher.batched_queries,
+            )
+            registry.counter(
+                "vidya_moderation_fallbacks_total", lambda: batcher.fallbacks
+            )
+        if (prefilter := self.moderator.prefilter) is not None:
+            registry.gauge(
+                "vidya_prefilter_resolved_ratio", lambda: prefilter.resolved_fraction
+            )
+
+    async def aclose(self) -> None:
+        if self.metrics_server is not None:
+            await self.metrics_server.aclose()
+        await self.prefetcher.aclose()
+        await self.moderator.aclose()
+        await super().aclose()
+
+
+def _create_prefilter(settings: Settings) -> QueryPrefilter | None:
+    if not settings.moderation_prefilter:
+        return None
+    deny_path = settings.moderation_denylist_path
+    allow_path = settings.moderation_allowlist_path
+    review_path = settings.moderation_reviewlist_path
+    return QueryPrefilter(
+        deny_terms=load_terms(deny_path) if deny_path else DEFAULT_DENY_TERMS,
+        allow_terms=load_terms(allow_path) if allow_path else DEFAULT_ALLOW_TERMS,
+        review_terms=load_terms(review_path) if review_path else DEFAULT_REVIEW_TERMS,
+    )
@@ -1,21 +1,35 @@
+from __future__ import annotations
+
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from vidya.cache import SingleFlight
+from vidya.clients import HttpClientRegistry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
 
-import httpx
-import pandas as pd
+    import httpx
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class ExchangeRate:
-    rate: float
-    timestamp: datetime
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
 
-    def is_expired(self, max_age: timedelta = timedelta(hours=1)) -> bool:
-        return datetime.now() - self.timestamp > max_age
+_FALLBACK_RATE = 1.4
+
+
+@dataclass
+class ExchangeRateTable:
+    base: str
+    rates: dict[str, float]
+    fetched_at: float
 
 
 class ExchangeRateError(Exception):
@@ -23,44 +37,94 @@ class ExchangeRateError(Exception):
 
 
 class ExchangeRateService:
-    def __init__(self) -> None:
-        self._cache: dict[str, ExchangeRate] = {}
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        clients: HttpClientRegistry | None = None,
+        max_age: float = 3600.0,
+        refresh_ahead: float = 300.0,
+        retry_delay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clients = clients
+        self.max_age = max_age
+        self.refresh_ahead = refresh_ahead
+        self.retry_delay = retry_delay
+        self._clock = clock
+        self._tables: dict[str, ExchangeRateTable] = {}
+        self._next_refresh: dict[str, float] = {}
+        self._refreshes: SingleFlight[str, ExchangeRateTable | None] = SingleFlight()
+        self._background: set[asyncio.Task[ExchangeRateTable | None]] = set()
 
     async def get_rate(
         self, from_currency: str = "USD", to_currency: str = "CAD"
     ) -> float:
-        cache_key = f"{from_currency}-{to_currency}"
-
-        async with self._lock:
-            cached = self._cache.get(cache_key)
-            if cached and not cached.is_expired():
-                return cached.rate
-
-            try:
-                rate = await self._fetch_rate(from_currency, to_currency)
-                self._cache[cache_key] = ExchangeRate(
-                    rate=rate, timestamp=datetime.now()
-                )
-                return rate
-            except Exception as e:
-                logger.error(f"Failed to fetch exchange rate: {e}")
-                if cached:
+        table = self._tables.get(from_currency)
+        if table is None:
+            table = await self._refreshes.do(
+                from_currency, lambda: self._refresh(from_currency)
+            )
+            if table is None:
+                return _FALLBACK_RATE
+        elif self._clock() >= self._next_refresh.get(from_currency, 0.0):
+            self._refresh_in_background(from_currency)
+        return table.rates.get(to_currency, _FALLBACK_RATE)
+
+    def _refresh_in_background(self, base: str) -> None:
+        task = asyncio.create_task(
+            self._refreshes.do(base, lambda: self._refresh(base))
+        )
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _refresh(self, base: str) -> ExchangeRateTable | None:
+        try:
+            rates = await self._fetch_rates(base)
+        except Exception as e:
+            logger.error(f"Failed to fetch exchange rate: {e}")
+            self._next_refresh[base] = self._clock() + self.retry_delay
+            if (stale := self._tables.get(base)) is not None:
+                age = self._clock() - stale.fetched_at
+                if age > self.max_age:
                     logger.warning("Using expired exchange rate from cache")
-                    return cached.rate
-                return 1.4
+            return stale
+
+        table = ExchangeRateTable(base=base, rates=rates, fetched_at=self._clock())
+        self._tables[base] = table
+        self._next_refresh[base] = table.fetched_at + self.max_age - self.refresh_ahead
+        return table
 
-    async def _fetch_rate(self, from_currency: str, to_currency: str) -> float:
-        url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
+    async def _fetch_rates(self, base: str) -> dict[str, float]:
+        url = f"https://api.exchangerate-api.com/v4/latest/{base}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                return data["rates"].get(to_currency, 1.4)
-            except Exception as e:
-                raise ExchangeRateError(f"Failed to fetch exchange rate: {e!s}") from e
+        if self._clients is None:
+            async with HttpClientRegistry() as clients:
+                return await self._request_rates(clients.get(url), url)
+        return await self._request_rates(self._clients.get(url), url)
+
+    async def _request_rates(
+        self, client: httpx.AsyncClient, url: str
+    ) -> dict[str, float]:
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            return {currency: float(rate) for currency, rate in data["rates"].items()}
+        except Exception as e:
+            raise ExchangeRateError(f"Failed to fetch exchange rate: {e!s}") from e
+
+    async def aclose(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+
+_QUARTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+@dataclass
+class PriceHistogram:
+    counts: list[int]
+    edges: list[float]
 
 
 @dataclass
@@ -71,22 +135,117 @@ class PriceStatistics:
     q3_price: float
     max_price: float
     total_listings: int
-
-
-async def calculate_statistics(
-    prices: list[float], exchange_service: ExchangeRateService
+    mean_price: float = 0.0
+    stddev_price: float = 0.0
+    outliers_removed: int = 0
+    histogram: PriceHistogram | None = None
+
+
+def calculate_statistics(
+    prices: Sequence[float] | np.ndarray,
+    exchange_rate: float,
+    *,
+    trim_outliers: bool = False,
+    histogram_bins: int = 0,
 ) -> PriceStatistics:
-    if not prices:
+    return calculate_statistics_batch(
+        [prices],
+        exchange_rate,
+        trim_outliers=trim_outliers,
+        histogram_bins=histogram_bins,
+    )[0]
+
+
+def calculate_statistics_batch(
+    price_vectors: Sequence[Sequence[float] | np.ndarray],
+    exchange_rate: float,
+    *,
+    trim_outliers: bool = False,
+    histogram_bins: int = 0,
+) -> list[PriceStatistics]:
+    # numpy is imported on first use to keep bot startup fast
+    import numpy as np
+
+    if not price_vectors:
+        return []
+
+    counts = np.fromiter((len(v) for v in price_vectors), dtype=np.intp)
+    if not counts.all():
         raise ValueError("No prices provided for statistics calculation")
 
-    exchange_rate = await exchange_service.get_rate()
-    df = pd.Series(prices) * exchange_rate
-
-    return PriceStatistics(
-        min_price=round(df.min(), 2),
-        q1_price=round(df.quantile(0.25), 2),
-        median_price=round(df.median(), 2),
-        q3_price=round(df.quantile(0.75), 2),
-        max_price=round(df.max(), 2),
-        total_listings=len(df),
-    )
+    # one row per vector, padded with NaN, which np.sort places after real values
+    if len(price_vectors) == 1:
+        values = np.sort(np.asarray(price_vectors[0], dtype=np.float64))[np.newaxis]
+    else:
+        values = np.full((len(price_vectors), counts.max()), np.nan)
+        for row, vector in enumerate(price_vectors):
+            values[row, : counts[row]] = vector
+        values.sort(axis=1)
+    values *= exchange_rate
+
+    quartiles = _sorted_quartiles(values, counts)
+    removed = np.zeros_like(counts)
+    if trim_outliers:
+        fence = 1.5 * (quartiles[:, 3] - quartiles[:, 1])
+        low = (quartiles[:, 1] - fence)[:, np.newaxis]
+        high = (quartiles[:, 3] + fence)[:, np.newaxis]
+        outliers = (values < low) | (values > high)
+        removed = outliers.sum(axis=1)
+        if removed.any():
+            values[outliers] = np.nan
+            values.sort(axis=1)
+            counts = counts - removed
+            quartiles = _sorted_quartiles(values, counts)
+
+    valid = np.arange(values.shape[1]) < counts[:, np.newaxis]
+    means = np.where(valid, values, 0.0).sum(axis=1) / counts
+    deviations = np.where(valid, values - means[:, np.newaxis], 0.0)
+    stddevs = np.sqrt((deviations**2).sum(axis=1) / np.maximum(counts - 1, 1))
+
+    return [
+        PriceStatistics(
+            min_price=row_quartiles[0],
+            q1_price=row_quartiles[1],
+            median_price=row_quartiles[2],
+            q3_price=row_quartiles[3],
+            max_price=row_quartiles[4],
+            total_listings=int(count),
+            mean_price=round(float(mean), 2),
+            stddev_price=round(float(stddev), 2),
+            outliers_removed=int(row_removed),
+            histogram=(
+                _histogram(values[row, :count], histogram_bins)
+                if histogram_bins
+                else None
+            ),
+        )
+        for row, (row_quartiles, count, mean, stddev, row_removed) in enumerate(
+            zip(
+                quartiles.round(2).tolist(),
+                counts,
+                means,
+                stddevs,
+                removed,
+                strict=True,
+            )
+        )
+    ]
+
+
+def _sorted_quartiles(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    # linear interpolation between closest ranks, numpy's default quantile method
+    positions = np.asarray(_QUARTILES) * (counts[:, np.newaxis] - 1)
+    lower = positions.astype(np.intp)
+    upper = np.minimum(lower + 1, counts[:, np.newaxis] - 1)
+    low_values = np.take_along_axis(values, lower, axis=1)
+    high_values = np.take_along_axis(values, upper, axis=1)
+    return low_values + (high_values - low_values) * (positions - lower)
+
+
+def _histogram(values: np.ndarray, bins: int) -> PriceHistogram:
+    import numpy as np
+
+    counts, edges = np.histogram(values, bins=bins)
+    return PriceHistogram(counts=counts.tolist(), edges=edges.round(2).tolist())
@@ -0,0 +1,484 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+
+from vidya.config import Settings
+from vidya.metrics import MetricsSnapshot, registry
+from vidya.render import RenderError, price_sparkline
+from vidya.scraper import EbayScraperError, ListingBatch, scrape_ebay
+from vidya.services import ScrapeServices
+from vidya.utils import PriceStatistics, calculate_statistics, normalize_query
+
+logger = logging.getLogger(__name__)
+
+_PING = "ping"
+
+
+class WorkerError(Exception):
+    pass
+
+
+class WorkerUnavailableError(WorkerError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class EbayJob:
+    job_id: int
+    query: str
+    pages: int = 1
+    guild_id: int | None = None
+    refresh: bool = False
+    listings_only: bool = False
+    speculative: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class CancelJob:
+    job_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class EbayJobResult:
+    job_id: int
+    stats: PriceStatistics | None = None
+    chart: bytes | None = None
+    sparkline: str | None = None
+    error: str | None = None
+    scrape_failed: bool = False
+    expires_in: float | None = None
+    listings: ListingBatch | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Heartbeat:
+    worker: int
+    in_flight: int
+    completed: int
+    idle: bool = True
+    metrics: MetricsSnapshot | None = None
+
+
+type WorkerTarget = Callable[[int, Settings, Queue, Queue], None]
+
+
+async def _scrape_listings(
+    services: ScrapeServices, settings: Settings, job: EbayJob
+) -> ListingBatch:
+    history = services.history
+    listings = await scrape_ebay(
+        job.query,
+        clients=services.http_clients,
+        pages=job.pages,
+        concurrency=settings.scrape_page_concurrency,
+        executor=services.parse_executor,
+        scheduler=services.scheduler,
+        guild_id=job.guild_id,
+        known=history.known_keys(job.query) if history else None,
+    )
+    if history is None:
+        return listings
+
+    history.record(job.query, listings)
+    return history.listings(job.query)
+
+
+async def _summarize(
+    services: ScrapeServices, settings: Settings, job: EbayJob, listings: ListingBatch
+) -> EbayJobResult:
+    expires_in = services.scrape_cache.expires_in(job.query, job.pages)
+    if job.listings_only:
+        return EbayJobResult(job.job_id, listings=listings, expires_in=expires_in)
+    if not listings:
+        return EbayJobResult(job.job_id, expires_in=expires_in)
+
+    prices = listings.prices
+    exchange_rate = await services.exchange.get_rate()
+    stats = calculate_statistics(
+        prices, exchange_rate, trim_outliers=settings.stats_trim_outliers
+    )
+    if services.render.options.is_text:
+        sparkline = price_sparkline(prices, exchange_rate)
+        return EbayJobResult(
+            job.job_id, stats, sparkline=sparkline, expires_in=expires_in
+        )
+    try:
+        with registry.span("render"):
+            chart = await services.render.render(prices, exchange_rate)
+    except RenderError as e:
+        logger.warning(f"Chart rendering failed for query '{job.query}': {e}")
+        chart = None
+    return EbayJobResult(job.job_id, stats, chart=chart, expires_in=expires_in)
+
+
+async def run_job(
+    services: ScrapeServices, settings: Settings, job: EbayJob
+) -> EbayJobResult:
+    cache = services.scrape_cache
+    fetch = cache.refresh if job.refresh else cache.get_or_fetch
+    # a cancelled speculative job undoes only a fetch it started itself
+    owned = (
+        job.speculative
+        and cache.expires_in(job.query, job.pages) is None
+        and not cache.fetching(job.query, job.pages)
+    )
+    listings = None
+    try:
+        listings = await fetch(
+            job.query,
+            lambda: _scrape_listings(services, settings, job),
+            pages=job.pages,
+        )
+        return await _summarize(services, settings, job, listings)
+
+    except asyncio.CancelledError:
+        if owned and listings is not None:
+            cache.discard(job.query, job.pages, listings)
+        elif owned:
+            cache.cancel(job.query, job.pages)
+        raise
+    except EbayScraperError as e:
+        return EbayJobResult(job.job_id, error=str(e), scrape_failed=True)
+    except Exception as e:
+        logger.error(f"Job for query '{job.query}' failed: {e}", exc_info=True)
+        return EbayJobResult(job.job_id, error=str(e))
+
+
+class _Worker:
+    def __init__(
+        self, index: int, settings: Settings, jobs: Queue, results: Queue
+    ) -> None:
+        self.index = index
+        self.settings = settings
+        self.jobs = jobs
+        self.results = results
+        self.completed = 0
+        self._tasks: dict[int, asyncio.Task[None]] = {}
+
+    async def serve(self) -> None:
+        # rendering already runs off the parent's event loop, so a thread is
+        # enough here and avoids a process pool per worker
+        render_executor = ThreadPoolExecutor(1, thread_name_prefix="render")
+        services = ScrapeServices.create(self.settings, render_executor)
+        services.start()
+        slots = asyncio.Semaphore(self.settings.worker_max_jobs)
+        loop = asyncio.get_running_loop()
+        try:
+            while (
+                message := await loop.run_in_executor(None, self.jobs.get)
+            ) is not None:
+                if message == _PING:
+                    self.results.put(self._heartbeat(services))
+                elif isinstance(message, CancelJob):
+                    if (task := self._tasks.get(message.job_id)) is not None:
+                        task.cancel()
+                else:
+                    self._start(services, slots, message)
+            # drain: every accepted job still gets its answer before exiting
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self.results.put(self._heartbeat(services))
+        finally:
+            await services.aclose()
+            render_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _heartbeat(self, services: ScrapeServices) -> Heartbeat:
+        # spans and gauges only exist in this process, so they ride along
+        return Heartbeat(
+            self.index,
+            len(self._tasks),
+            self.completed,
+            idle=not self._tasks and services.scheduler.idle,
+            metrics=registry.collect(),
+        )
+
+    def _start(
+        self, services: ScrapeServices, slots: asyncio.Semaphore, job: EbayJob
+    ) -> None:
+        task = asyncio.create_task(self._run(services, slots, job))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+
+    async def _run(
+        self, services: ScrapeServices, slots: asyncio.Semaphore, job: EbayJob
+    ) -> None:
+        try:
+            async with slots:
+                result = await run_job(services, self.settings, job)
+        except asyncio.CancelledError:
+            # the front end gave up on this job, so nobody awaits an answer
+            return
+        self.completed += 1
+        self.results.put(result)
+
+
+def _worker_main(index: int, settings: Settings, jobs: Queue, results: Queue) -> None:
+    # the front end owns shutdown and drains workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(_Worker(index, settings, jobs, results).serve())
+
+
+def _worker_settings(settings: Settings, workers: int) -> Settings:
+    # eBay's limits apply to the whole host, so each worker gets its share
+    return replace(
+        settings,
+        worker_processes=0,
+        metrics_port=0,
+        prefetch_top_k=0,
+        ebay_rate_limit=settings.ebay_rate_limit / workers,
+        ebay_burst=max(1, settings.ebay_burst // workers),
+        ebay_max_concurrency=max(1, settings.ebay_max_concurrency // workers),
+    )
+
+
+@dataclass
+class _WorkerHandle:
+    index: int
+    process: BaseProcess
+    jobs: Queue
+    results: Queue
+    reader: threading.Thread | None = None
+    last_seen: float = field(default_factory=time.monotonic)
+    in_flight: set[int] = field(default_factory=set)
+    idle: bool = True
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        settings: Settings,
+        workers: int = 2,
+        health_interval: float = 5.0,
+        health_timeout: float = 15.0,
+        drain_timeout: float = 30.0,
+        target: WorkerTarget = _worker_main,
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"Worker pool needs at least one worker, got {workers}")
+        self.workers = workers
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.drain_timeout = drain_timeout
+        self.submitted = 0
+        self.completed = 0
+        self.restarts = 0
+        self._settings = _worker_settings(settings, workers)
+        self._target = target
+        self._context = multiprocessing.get_context("spawn")
+        self._handles: list[_WorkerHandle] = []
+        self._futures: dict[int, asyncio.Future[EbayJobResult]] = {}
+        # when each worker's cached listings go stale, keyed like ScrapeCache
+        self._expiry: dict[tuple[str, int], tuple[int, float]] = {}
+        self._job_ids = itertools.count()
+        self._health_task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._futures)
+
+    @property
+    def healthy(self) -> int:
+        return sum(handle.process.is_alive() for handle in self._handles)
+
+    @property
+    def idle(self) -> bool:
+        # as of the last heartbeat, which is at most one health interval old
+        return not self._futures and all(handle.idle for handle in self._handles)
+
+    def expires_in(self, query: str, pages: int = 1) -> float | None:
+        key = (normalize_query(query), pages)
+        if (entry := self._expiry.get(key)) is None:
+            return None
+        remaining = entry[1] - time.monotonic()
+        if remaining <= 0:
+            del self._expiry[key]
+            return None
+        return remaining
+
+    def start(self) -> None:
+        if self._handles:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._handles = [self._spawn(index) for index in range(self.workers)]
+        self._health_task = asyncio.create_task(self._check_health_forever())
+        logger.info(f"Started {self.workers} job workers")
+
+    def _spawn(self, index: int) -> _WorkerHandle:
+        # fresh queues per process: a killed worker can leave a queue unusable
+        jobs, results = self._context.Queue(), self._context.Queue()
+        process = self._context.Process(
+            target=self._target,
+            args=(index, self._settings, jobs, results),
+            name=f"vidya-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        handle = _WorkerHandle(index, process, jobs, results)
+        handle.reader = threading.Thread(
+            target=self._read_results,
+            args=(handle,),
+            name=f"vidya-worker-{index}-results",
+            daemon=True,
+        )
+        handle.reader.start()
+        return handle
+
+    def _read_results(self, handle: _WorkerHandle) -> None:
+        while (message := handle.results.get()) is not None:
+            self._loop.call_soon_threadsafe(self._dispatch, handle, message)
+
+    def _dispatch(
+        self, handle: _WorkerHandle, message: EbayJobResult | Heartbeat
+    ) -> None:
+        handle.last_seen = time.monotonic()
+        if isinstance(message, Heartbeat):
+            handle.idle = message.idle
+            if message.metrics is not None:
+                registry.merge(message.metrics, worker=str(handle.index))
+            return
+        self.completed += 1
+        handle.in_flight.discard(message.job_id)
+        future = self._futures.pop(message.job_id, None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _route(self, query: str) -> _WorkerHandle:
+        # the same query lands on the same worker so its caches stay warm
+        start = zlib.crc32(normalize_query(query).encode()) % len(self._handles)
+        for offset in range(len(self._handles)):
+            handle = self._handles[(start + offset) % len(self._handles)]
+            if handle.process.is_alive():
+                return handle
+        return self._handles[start]
+
+    async def submit(
+        self,
+        query: str,
+        pages: int = 1,
+        guild_id: int | None = None,
+        refresh: bool = False,
+        listings_only: bool = False,
+        speculative: bool = False,
+    ) -> EbayJobResult:
+        if self._closing or not self._handles:
+            raise WorkerUnavailableError("Worker pool is not accepting jobs")
+
+        job = EbayJob(
+            next(self._job_ids),
+            query,
+            pages,
+            guild_id,
+            refresh=refresh,
+            listings_only=listings_only,
+            speculative=speculative,
+        )
+        handle = self._route(query)
+        future = self._futures[job.job_id] = self._loop.create_future()
+        handle.in_flight.add(job.job_id)
+        handle.jobs.put(job)
+        self.submitted += 1
+        try:
+            result = await future
+        except asyncio.CancelledError:
+            # otherwise the worker keeps scraping for an answer nobody reads
+            handle.jobs.put(CancelJob(job.job_id))
+            raise
+        finally:
+            self._futures.pop(job.job_id, None)
+            handle.in_flight.discard(job.job_id)
+
+        if result.expires_in is not None:
+            deadline = time.monotonic() + result.expires_in
+            self._expiry[normalize_query(query), pages] = (handle.index, deadline)
+        if result.scrape_failed:
+            raise EbayScraperError(result.error)
+        if result.error is not None:
+            raise WorkerError(result.error)
+        return result
+
+    async def listings(
+        self, query: str, pages: int = 1, guild_id: int | None = None
+    ) -> ListingBatch:
+        result = await self.submit(query, pages, guild_id, listings_only=True)
+        return result.listings
+
+    async def _check_health_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        now = time.monotonic()
+        self._expiry = {
+            key: entry for key, entry in self._expiry.items() if entry[1] > now
+        }
+        for handle in list(self._handles):
+            if (
+                handle.process.is_alive()
+                and now - handle.last_seen < self.health_timeout
+            ):
+                handle.jobs.put(_PING)
+                continue
+            logger.warning(f"Restarting unresponsive job worker {handle.index}")
+            await self._stop(handle, timeout=0)
+            self._fail(handle, WorkerError(f"Job worker {handle.index} stopped"))
+            self._forget(handle.index)
+            self._handles[handle.index] = self._spawn(handle.index)
+            self.restarts += 1
+
+    def _fail(self, handle: _WorkerHandle, error: Exception) -> None:
+        for job_id in handle.in_flight:
+            future = self._futures.pop(job_id, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+        handle.in_flight.clear()
+
+    def _forget(self, index: int) -> None:
+        # a respawned worker starts with an empty scrape cache
+        self._expiry = {
+            key: entry for key, entry in self._expiry.items() if entry[0] != index
+        }
+
+    async def _stop(self, handle: _WorkerHandle, timeout: float) -> None:
+        await asyncio.to_thread(handle.process.join, timeout)
+        if handle.process.is_alive():
+            handle.process.kill()
+            await asyncio.to_thread(handle.process.join)
+        handle.results.put(None)
+        if handle.reader is not None:
+            await asyncio.to_thread(handle.reader.join)
+
+    async def aclose(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+
+        # graceful drain: workers finish what they accepted, then exit
+        for handle in self._handles:
+            handle.jobs.put(None)
+        if self._futures:
+            await asyncio.wait(list(self._futures.values()), timeout=self.drain_timeout)
+        for handle in self._handles:
+            await self._stop(handle, timeout=self.drain_timeout)
+            self._fail(handle, WorkerUnavailableError("Worker pool shut down"))
+        self._handles = []
+        logger.info(f"Drained job workers after {self.completed} jobs")
@@ -0,0 +1,229 @@
+"""Benchmark the parse, statistics and render hot paths offline.
+
+Parsing runs over the synthetic eBay result page fixtures, plus any captured
+pages saved next to them.
+
+Run with ``python -m tests.benchmarks.bench_hotpaths``. Use ``--save`` to
+write a JSON baseline and ``--compare`` to flag regressions against one.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import pickle
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from selectolax.lexbor import LexborHTMLParser
+
+from tests.fixtures import ebay_page_names, load_ebay_page
+from vidya.render import ChartOptions, create_price_visualization
+from vidya.scraper import parse_ebay_listings, parse_listing
+from vidya.utils import calculate_statistics
+
+DEFAULT_BASELINE = Path(".benchmarks/baseline.json")
+STATS_SIZES = (10, 100, 1_000, 10_000, 100_000)
+RENDER_SIZES = (10, 1_000, 100_000)
+RENDER_OPTIONS = (
+    ChartOptions("matplotlib", "palette_png", 100),
+    ChartOptions("raster", "png", 100),
+    ChartOptions("raster", "palette_png", 100),
+    ChartOptions("raster", "webp", 100),
+    ChartOptions("text"),
+)
+EXCHANGE_RATE = 1.35
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], object]
+
+
+@dataclass
+class Result:
+    name: str
+    runs: int
+    median_seconds: float
+    min_seconds: float
+    peak_bytes: int
+    output_bytes: int
+
+
+def synthetic_prices(size: int, seed: int = 0) -> list[float]:
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(mean=5.0, sigma=0.6, size=size).round(2).tolist()
+
+
+def parse_cases(loop: asyncio.AbstractEventLoop) -> Iterator[Case]:
+    for name in ebay_page_names():
+        html = load_ebay_page(name)
+        items = LexborHTMLParser(html).css("li.s-item")
+        yield Case(
+            f"parse_ebay_listings[{name}]",
+            lambda html=html: loop.run_until_complete(parse_ebay_listings(html)),
+        )
+        yield Case(
+            f"parse_listing[{name}]",
+            lambda items=items: [parse_listing(item) for item in items],
+        )
+
+
+def stats_cases() -> Iterator[Case]:
+    for size in STATS_SIZES:
+        prices = synthetic_prices(size)
+        yield Case(
+            f"calculate_statistics[{size}]",
+            lambda prices=prices: calculate_statistics(prices, EXCHANGE_RATE),
+        )
+
+
+def render_cases() -> Iterator[Case]:
+    for size in RENDER_SIZES:
+        prices = synthetic_prices(size)
+        yield Case(
+            f"create_price_visualization[{size}]",
+            lambda prices=prices: create_price_visualization(prices, EXCHANGE_RATE),
+        )
+        for options in RENDER_OPTIONS:
+            yield Case(
+                f"create_price_visualization[{options.backend},"
+                f"{options.image_format},{options.dpi},{size}]",
+                lambda prices=prices, options=options: create_price_visualization(
+                    prices, EXCHANGE_RATE, options
+                ),
+            )
+
+
+def output_size(output: object) -> int:
+    if isinstance(output, bytes):
+        return len(output)
+    return len(pickle.dumps(output))
+
+
+def measure(case: Case, min_time: float, min_runs: int = 3) -> Result:
+    output = case.run()
+
+    timings: list[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - start)
+
+    # a separate traced run so tracemalloc overhead stays out of the timings
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=case.name,
+        runs=len(timings),
+        median_seconds=statistics.median(timings),
+        min_seconds=min(timings),
+        peak_bytes=peak,
+        output_bytes=output_size(output),
+    )
+
+
+def compare(
+    baseline: dict[str, dict[str, float]],
+    results: list[Result],
+    threshold: float,
+    min_delta: float = 1e-4,
+) -> list[str]:
+    regressions: list[str] = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        # the fastest run is far less noisy than the median on a busy machine,
+        # and sub-0.1ms swings on tiny inputs are timer noise, not regressions
+        for metric, floor in (("min_seconds", min_delta), ("peak_bytes", 0)):
+            before = previous[metric]
+            after = getattr(result, metric)
+            if after > before * (1 + threshold) and after - before > floor:
+                regressions.append(
+                    f"{result.name} {metric}: {before:.6g} -> {after:.6g} "
+                    f"(+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def load_baseline(path: Path) -> dict[str, dict[str, float]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {result["name"]: result for result in data["results"]}
+
+
+def save_baseline(path: Path, results: list[Result]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("-k", "--filter", default="", help="only run matching cases")
+    parser.add_argument("--save", type=Path, nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--compare", type=Path, nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+    logging.getLogger("vidya").setLevel(logging.ERROR)
+
+    loop = asyncio.new_event_loop()
+    try:
+        cases = [
+            case
+            for case in (*parse_cases(loop), *stats_cases(), *render_cases())
+            if args.filter in case.name
+        ]
+        print(f"{'case':<64}{'runs':>6}{'median':>12}{'peak mem':>12}{'output':>12}")
+        results: list[Result] = []
+        for case in cases:
+            result = measure(case, args.min_time)
+            results.append(result)
+            print(
+                f"{result.name:<64}{result.runs:>6}"
+                f"{result.median_seconds * 1000:>10.3f}ms"
+                f"{result.peak_bytes / 1024:>10.1f}KB"
+                f"{result.output_bytes / 1024:>10.1f}KB"
+            )
+    finally:
+        loop.close()
+
+    regressions: list[str] = []
+    if args.compare:
+        regressions = compare(load_baseline(args.compare), results, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.compare}")
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"Saved baseline to {args.save}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
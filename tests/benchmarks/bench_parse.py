@@ -0,0 +1,85 @@
+"""Compare listing extraction throughput on the eBay result page fixtures.
+
+The synthetic pages always run; captured pages run too once they are added.
+
+Run with ``python -m tests.benchmarks.bench_parse``.
+"""
+
+import argparse
+import logging
+import time
+from collections.abc import Callable
+
+from selectolax.parser import HTMLParser, Node
+
+from tests.fixtures import ebay_page_names, load_ebay_page
+from vidya.scraper import EbayListing, extract_listings
+
+
+def legacy_parse_listing(item: Node) -> EbayListing | None:
+    title_tag = item.css_first(".s-item__title")
+    price_tag = item.css_first(".s-item__price")
+    link_tag = item.css_first(".s-item__link")
+
+    if not all([title_tag, price_tag]):
+        return None
+
+    title = title_tag.text(strip=True)
+    price_text = price_tag.text(strip=True).replace("$", "").replace(",", "")
+    url = link_tag.attributes.get("href") if link_tag else None
+
+    try:
+        return EbayListing(title=title, price=float(price_text), url=url)
+    except ValueError:
+        return None
+
+
+def legacy_extract_listings(html_content: str) -> list[EbayListing]:
+    if "Results matching fewer words" in html_content:
+        html_content = html_content.split("Results matching fewer words")[0]
+
+    tree = HTMLParser(html_content)
+    parsed_listings = [
+        listing
+        for item in tree.css("li.s-item")
+        if (listing := legacy_parse_listing(item))
+    ]
+    return parsed_listings[2:]
+
+
+def measure(
+    extract: Callable[[str], list[EbayListing]], html: str, min_time: float
+) -> tuple[int, float]:
+    runs = 0
+    listings = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < min_time or runs == 0:
+        listings += len(extract(html))
+        runs += 1
+    return listings, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-time", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.getLogger("vidya").setLevel(logging.ERROR)
+
+    names = ebay_page_names()
+    width = max(len(name) for name in names) + 2
+    print(f"{'page':<{width}}{'path':<8}{'listings':>10}{'listings/sec':>16}")
+    for name in names:
+        html = load_ebay_page(name).decode()
+        assert legacy_extract_listings(html) == extract_listings(html), name
+        for label, extract in (
+            ("old", legacy_extract_listings),
+            ("new", extract_listings),
+        ):
+            listings, elapsed = measure(extract, html, args.min_time)
+            per_page = len(extract(html))
+            rate = listings / elapsed
+            print(f"{name:<{width}}{label:<8}{per_page:>10}{rate:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
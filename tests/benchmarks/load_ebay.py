@@ -0,0 +1,275 @@
+"""Drive concurrent ``!ebay`` commands against local stand-ins for every service.
+
+eBay serves the synthetic fixture pages, OpenAI returns scripted chat
+completions and the rate API returns a fixed table, each behind an
+``httpx.MockTransport`` with configurable latency, so the run is fully
+offline. Run with ``python -m tests.benchmarks.load_ebay``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+import httpx
+import openai
+
+from tests.fixtures import ebay_page_names, load_ebay_page
+from vidya.bot import bot, ebay_command
+from vidya.clients import HttpClientRegistry
+from vidya.config import Settings
+from vidya.metrics import registry
+from vidya.services import Services
+from vidya.utils import ExchangeRateService
+
+DENIED_TERM = "counterfeit"
+RATES_HOST = "api.exchangerate-api.com"
+
+
+@dataclass
+class Latencies:
+    ebay: float
+    openai: float
+    rates: float
+
+
+class FakeMessage:
+    async def delete(self) -> None:
+        pass
+
+
+@dataclass
+class FakeUser:
+    id: int
+
+
+@dataclass
+class FakeGuild:
+    id: int
+
+
+@dataclass
+class FakeContext:
+    author: FakeUser
+    guild: FakeGuild
+    sent: list[dict[str, object]] = field(default_factory=list)
+
+    async def send(self, content: str | None = None, **kwargs: object) -> FakeMessage:
+        self.sent.append({"content": content, **kwargs})
+        return FakeMessage()
+
+    @asynccontextmanager
+    async def typing(self) -> AsyncIterator[None]:
+        yield
+
+
+def ebay_transport(latencies: Latencies) -> httpx.MockTransport:
+    pages = itertools.cycle([load_ebay_page(name) for name in ebay_page_names()])
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == RATES_HOST:
+            await asyncio.sleep(latencies.rates)
+            return httpx.Response(200, json={"rates": {"CAD": 1.35, "EUR": 0.92}})
+        await asyncio.sleep(latencies.ebay)
+        return httpx.Response(200, content=next(pages))
+
+    return httpx.MockTransport(handler)
+
+
+def completion(contents: list[str]) -> dict[str, object]:
+    return {
+        "id": "chatcmpl-load",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "index": index,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+            for index, content in enumerate(contents)
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def verdict_for(query: str) -> str:
+    return "DENY: counterfeit goods" if DENIED_TERM in query else "ALLOW"
+
+
+def openai_transport(latency: float) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        body = json.loads(request.content)
+        if count := body.get("n"):
+            return httpx.Response(200, json=completion(["Go away."] * count))
+        if "response_format" in body:
+            queries = json.loads(body["messages"][-1]["content"])
+            verdicts = [verdict_for(query) for query in queries]
+            return httpx.Response(
+                200, json=completion([json.dumps({"verdicts": verdicts})])
+            )
+        prompt = body["messages"][-1]["content"]
+        return httpx.Response(200, json=completion([verdict_for(prompt)]))
+
+    return httpx.MockTransport(handler)
+
+
+async def create_services(latencies: Latencies) -> Services:
+    settings = Settings(
+        ebay_rate_limit=1_000_000.0,
+        ebay_burst=1_000_000,
+        ebay_max_concurrency=1_000_000,
+        metrics_port=0,
+        prefetch_top_k=0,
+    )
+    services = Services.create(settings)
+    await services.http_clients.aclose()
+
+    clients = HttpClientRegistry(transport=ebay_transport(latencies))
+    services.http_clients = clients
+    services.exchange = ExchangeRateService(clients)
+    services.moderator.client = openai.AsyncOpenAI(
+        api_key="load-test",
+        http_client=httpx.AsyncClient(transport=openai_transport(latencies.openai)),
+    )
+    services.start()
+    return services
+
+
+async def monitor_loop_lag(lags: list[float], interval: float = 0.01) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)] if ordered else 0.0
+
+
+async def run_level(
+    concurrency: int, latencies: Latencies, deny_every: int
+) -> dict[str, float]:
+    registry.clear()
+    services = await create_services(latencies)
+    bot._services = services
+    lags: list[float] = []
+    monitor = asyncio.create_task(monitor_loop_lag(lags))
+    latencies_seen: list[float] = []
+    outcomes: Counter[str] = Counter()
+
+    async def one(index: int) -> None:
+        query = f"{DENIED_TERM} item {index}" if index % deny_every == 0 else None
+        ctx = FakeContext(FakeUser(index), FakeGuild(index % 10))
+        started = time.perf_counter()
+        await ebay_command(ctx, query=query or f"vintage item {index}")
+        latencies_seen.append(time.perf_counter() - started)
+        last = ctx.sent[-1] if ctx.sent else {}
+        content = str(last.get("content") or "")
+        if "eBay Stats" in content:
+            outcomes["chart" if "file" in last else "no_chart"] += 1
+        elif content.startswith("❌"):
+            outcomes["error"] += 1
+        else:
+            outcomes["denied"] += 1
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(index) for index in range(1, concurrency + 1)))
+    finally:
+        elapsed = time.perf_counter() - started
+        monitor.cancel()
+        await asyncio.gather(monitor, return_exceptions=True)
+        await services.aclose()
+        if services.moderator.client is not None:
+            await services.moderator.client.close()
+        bot._services = None
+
+    return {
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput": concurrency / elapsed,
+        "p50_ms": percentile(latencies_seen, 0.5) * 1000,
+        "p95_ms": percentile(latencies_seen, 0.95) * 1000,
+        "p99_ms": percentile(latencies_seen, 0.99) * 1000,
+        "lag_p99_ms": percentile(lags, 0.99) * 1000,
+        "lag_max_ms": max(lags, default=0.0) * 1000,
+        "rss_growth_mb": rss_mb() - rss_before,
+        **{outcome: float(count) for outcome, count in outcomes.items()},
+    }
+
+
+async def run(args: argparse.Namespace) -> list[dict[str, float]]:
+    latencies = Latencies(
+        ebay=args.ebay_latency, openai=args.openai_latency, rates=args.rates_latency
+    )
+    results: list[dict[str, float]] = []
+    print(
+        f"{'conc':>6}{'cmd/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+        f"{'lag p99':>9}{'lag max':>9}{'rss+':>9}  outcomes"
+    )
+    for concurrency in args.levels:
+        result = await run_level(concurrency, latencies, args.deny_every)
+        results.append(result)
+        outcomes = ", ".join(
+            f"{key}={int(result[key])}"
+            for key in ("chart", "no_chart", "denied", "error")
+            if key in result
+        )
+        print(
+            f"{concurrency:>6}{result['throughput']:>9.1f}"
+            f"{result['p50_ms']:>7.0f}ms{result['p95_ms']:>7.0f}ms"
+            f"{result['p99_ms']:>7.0f}ms{result['lag_p99_ms']:>7.1f}ms"
+            f"{result['lag_max_ms']:>7.1f}ms{result['rss_growth_mb']:>7.1f}MB"
+            f"  {outcomes}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--levels",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 10, 100, 1000],
+    )
+    parser.add_argument("--ebay-latency", type=float, default=0.2)
+    parser.add_argument("--openai-latency", type=float, default=0.4)
+    parser.add_argument("--rates-latency", type=float, default=0.1)
+    parser.add_argument("--deny-every", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("vidya").setLevel(logging.ERROR)
+
+    results = asyncio.run(run(args))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
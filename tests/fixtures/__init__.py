@@ -0,0 +1,20 @@
+from pathlib import Path
+
+EBAY_PAGES_DIR = Path(__file__).parent / "ebay"
+# synthetic_*.html pages are generated markup shaped like eBay's sold results,
+# not saved pages; real captures go next to them as captured_*.html with
+# cookies, tokens and tracking parameters stripped
+SYNTHETIC_PREFIX = "synthetic_"
+CAPTURED_PREFIX = "captured_"
+
+
+def ebay_page_names() -> list[str]:
+    return sorted(path.name for path in EBAY_PAGES_DIR.glob("*.html"))
+
+
+def captured_page_names() -> list[str]:
+    return [name for name in ebay_page_names() if name.startswith(CAPTURED_PREFIX)]
+
+
+def load_ebay_page(name: str) -> bytes:
+    return (EBAY_PAGES_DIR / name).read_bytes()
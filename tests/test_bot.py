@@ -1,18 +1,47 @@
-import io
+import asyncio
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from discord import File
+from discord.ext import commands
 
-from vidya.bot import ebay_command, handle_moderation
+from vidya.bot import (
+    bot,
+    ebay_command,
+    ebaycompare_command,
+    format_perf_report,
+    handle_moderation,
+    parse_compare_queries,
+    parse_query_options,
+    perf_command_error,
+    scrape_listings,
+    warm_query,
+)
+from vidya.config import Settings
+from vidya.history import ListingHistory
+from vidya.metrics import MetricsRegistry
 from vidya.moderation import ModerationResult
-from vidya.scraper import EbayListing
+from vidya.render import ChartOptions, RenderTimeoutError
+from vidya.scraper import EbayListing, EbayScraperError, ListingBatch
+from vidya.services import Services
+from vidya.utils import PriceStatistics
+from vidya.workers import EbayJobResult
+
+
+@pytest.fixture(autouse=True)
+async def services() -> object:
+    services = Services.create(Settings())
+    with patch.object(bot, "_services", services):
+        yield services
+    await services.aclose()
 
 
 @pytest.mark.asyncio
 async def test_handle_moderation_allowed(mock_ctx: MagicMock) -> None:
     with patch(
-        "vidya.bot.moderator.check_content", return_value=ModerationResult(allowed=True)
+        "vidya.bot.bot.services.moderator.check_content",
+        return_value=ModerationResult(allowed=True),
     ):
         result = await handle_moderation(mock_ctx, "test query")
         assert result is True
@@ -24,7 +53,9 @@ async def test_handle_moderation_blocked(mock_ctx: MagicMock) -> None:
     mock_result = ModerationResult(
         allowed=False, message="Test blocked message", reason="Test reason"
     )
-    with patch("vidya.bot.moderator.check_content", return_value=mock_result):
+    with patch(
+        "vidya.bot.bot.services.moderator.check_content", return_value=mock_result
+    ):
         result = await handle_moderation(mock_ctx, "bad query")
         assert result is False
         mock_ctx.send.assert_called_once_with("Test blocked message")
@@ -37,10 +68,11 @@ async def test_ebay_command_success(mock_ctx: MagicMock) -> None:
     mock_message.delete = AsyncMock()
     mock_ctx.send = AsyncMock(return_value=mock_message)
 
-    mock_listings = [
-        EbayListing(title="Test Item 1", price=100.0, url="http://test1.com"),
-        EbayListing(title="Test Item 2", price=200.0, url="http://test2.com"),
-    ]
+    mock_listings = ListingBatch(
+        ["Test Item 1", "Test Item 2"],
+        [100.0, 200.0],
+        ["http://test1.com", "http://test2.com"],
+    )
 
     mock_stats = MagicMock()
     mock_stats.min_price = 150.0
@@ -49,15 +81,15 @@ async def test_ebay_command_success(mock_ctx: MagicMock) -> None:
     mock_stats.q3_price = 300.0
     mock_stats.max_price = 300.0
     mock_stats.total_listings = 2
-
-    mock_buffer = io.BytesIO(b"fake image data")
+    mock_stats.outliers_removed = 0
 
     with (
         patch("vidya.bot.handle_moderation", return_value=True),
         patch("vidya.bot.scrape_ebay", AsyncMock(return_value=mock_listings)),
-        patch("vidya.bot.calculate_statistics", AsyncMock(return_value=mock_stats)),
+        patch("vidya.bot.calculate_statistics", MagicMock(return_value=mock_stats)),
         patch(
-            "vidya.bot.create_price_visualization", MagicMock(return_value=mock_buffer)
+            "vidya.bot.bot.services.render.render",
+            AsyncMock(return_value=b"fake image data"),
         ),
         patch("discord.File", MagicMock(return_value=MagicMock(spec=File))),
     ):
@@ -92,9 +124,419 @@ async def test_ebay_command_no_results(mock_ctx: MagicMock) -> None:
 
     with (
         patch("vidya.bot.handle_moderation", return_value=True),
-        patch("vidya.bot.scrape_ebay", AsyncMock(return_value=[])),
+        patch("vidya.bot.scrape_ebay", AsyncMock(return_value=ListingBatch())),
     ):
         await ebay_command(mock_ctx, query="test")
 
         mock_message.delete.assert_called_once()
         mock_ctx.send.assert_any_call("📭 No listings found for your query.")
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_render_failure(mock_ctx: MagicMock) -> None:
+    mock_message = MagicMock()
+    mock_message.delete = AsyncMock()
+    mock_ctx.send = AsyncMock(return_value=mock_message)
+
+    mock_listings = ListingBatch(["Test Item"], [100.0])
+    mock_stats = MagicMock(
+        min_price=150.0,
+        q1_price=150.0,
+        median_price=150.0,
+        q3_price=150.0,
+        max_price=150.0,
+        total_listings=1,
+        outliers_removed=0,
+    )
+
+    with (
+        patch("vidya.bot.handle_moderation", return_value=True),
+        patch("vidya.bot.scrape_ebay", AsyncMock(return_value=mock_listings)),
+        patch("vidya.bot.calculate_statistics", MagicMock(return_value=mock_stats)),
+        patch(
+            "vidya.bot.bot.services.render.render",
+            AsyncMock(side_effect=RenderTimeoutError("too slow")),
+        ),
+    ):
+        await ebay_command(mock_ctx, query="test")
+
+        final_call_args = mock_ctx.send.call_args_list[-1]
+        assert "Total Listings: 1" in final_call_args[1]["content"]
+        assert "file" not in final_call_args[1]
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_text_chart(mock_ctx: MagicMock) -> None:
+    mock_ctx.send = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+    mock_listings = ListingBatch(["Test Item 1", "Test Item 2"], [100.0, 200.0])
+    render = AsyncMock()
+
+    with (
+        patch("vidya.bot.handle_moderation", return_value=True),
+        patch("vidya.bot.scrape_ebay", AsyncMock(return_value=mock_listings)),
+        patch("vidya.bot.bot.services.render.options", ChartOptions("text")),
+        patch("vidya.bot.bot.services.render.render", render),
+    ):
+        await ebay_command(mock_ctx, query="test")
+
+    final_call_args = mock_ctx.send.call_args_list[-1]
+    assert "█" in final_call_args[1]["content"]
+    assert "file" not in final_call_args[1]
+    render.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_hands_off_to_workers(mock_ctx: MagicMock) -> None:
+    mock_ctx.send = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+    stats = PriceStatistics(10.0, 12.0, 15.0, 18.0, 20.0, total_listings=4)
+    workers = MagicMock()
+    workers.submit = AsyncMock(return_value=EbayJobResult(0, stats, sparkline="▁█"))
+    workers.expires_in = MagicMock(return_value=300.0)
+    scrape = AsyncMock()
+
+    with (
+        patch.object(bot, "workers", workers),
+        patch("vidya.bot.handle_moderation", return_value=True),
+        patch("vidya.bot.scrape_ebay", scrape),
+    ):
+        await ebay_command(mock_ctx, query="--pages 2 test")
+
+    workers.submit.assert_awaited_once_with("test", 2, mock_ctx.guild.id)
+    final_call_args = mock_ctx.send.call_args_list[-1]
+    assert "Total Listings: 4" in final_call_args[1]["content"]
+    assert "▁█" in final_call_args[1]["content"]
+    assert "file" not in final_call_args[1]
+    scrape.assert_not_called()
+
+    workers.submit = AsyncMock(side_effect=EbayScraperError("blocked"))
+    with (
+        patch.object(bot, "workers", workers),
+        patch("vidya.bot.handle_moderation", return_value=True),
+    ):
+        await ebay_command(mock_ctx, query="test")
+
+    assert "blocked" in mock_ctx.send.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_ebay_worker_command_speculates_during_moderation(
+    mock_ctx: MagicMock,
+) -> None:
+    mock_ctx.send = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+    workers = MagicMock()
+    workers.submit = AsyncMock(return_value=EbayJobResult(0))
+    workers.expires_in = MagicMock(return_value=None)
+
+    async def moderate(ctx: object, query: str) -> bool:
+        workers.submit.assert_called_once()
+        return True
+
+    with (
+        patch.object(bot, "workers", workers),
+        patch("vidya.bot.handle_moderation", moderate),
+    ):
+        await ebay_command(mock_ctx, query="test")
+
+    workers.submit.assert_awaited_once_with(
+        "test", 1, mock_ctx.guild.id, speculative=True
+    )
+    assert "No listings found" in mock_ctx.send.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_ebay_worker_command_deny_cancels_speculative_job(
+    mock_ctx: MagicMock,
+) -> None:
+    job_started = asyncio.Event()
+    job_cancelled = asyncio.Event()
+
+    async def submit(*args: object, **kwargs: object) -> EbayJobResult:
+        job_started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            job_cancelled.set()
+            raise
+        return EbayJobResult(0)
+
+    async def moderate(ctx: object, query: str) -> bool:
+        await job_started.wait()
+        return False
+
+    workers = MagicMock()
+    workers.submit = submit
+    workers.expires_in = MagicMock(return_value=None)
+    with (
+        patch.object(bot, "workers", workers),
+        patch("vidya.bot.handle_moderation", moderate),
+    ):
+        await ebay_command(mock_ctx, query="bad query")
+
+    assert job_cancelled.is_set()
+    mock_ctx.send.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_warm_query_refreshes_through_workers() -> None:
+    workers = MagicMock()
+    workers.submit = AsyncMock(return_value=EbayJobResult(0))
+    with patch.object(bot, "workers", workers):
+        await warm_query("test", 2)
+
+    workers.submit.assert_awaited_once_with("test", 2, refresh=True)
+
+
+def test_parse_query_options() -> None:
+    assert parse_query_options("rtx 3080") == ("rtx 3080", 1)
+    assert parse_query_options("--pages 3 rtx 3080") == ("rtx 3080", 3)
+    assert parse_query_options("--pages=2 rtx 3080") == ("rtx 3080", 2)
+    assert parse_query_options("--pages 500 rtx 3080")[1] == 5
+
+    with pytest.raises(ValueError):
+        parse_query_options("--pages lots rtx 3080")
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_invalid_pages(mock_ctx: MagicMock) -> None:
+    await ebay_command(mock_ctx, query="--pages 0 test")
+    mock_ctx.send.assert_called_once()
+    assert "--pages" in mock_ctx.send.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_scrapes_while_moderating(mock_ctx: MagicMock) -> None:
+    mock_ctx.send = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+    scrape_started = asyncio.Event()
+
+    async def scrape(*args: object, **kwargs: object) -> ListingBatch:
+        scrape_started.set()
+        return ListingBatch(["Test Item"], [100.0])
+
+    async def moderate(ctx: object, query: str) -> bool:
+        await asyncio.wait_for(scrape_started.wait(), timeout=1)
+        return True
+
+    with (
+        patch("vidya.bot.handle_moderation", moderate),
+        patch("vidya.bot.scrape_ebay", scrape),
+        patch("vidya.bot.bot.services.exchange.get_rate", AsyncMock(return_value=1.4)),
+        patch(
+            "vidya.bot.bot.services.render.render",
+            AsyncMock(side_effect=RenderTimeoutError("too slow")),
+        ),
+    ):
+        await ebay_command(mock_ctx, query="test")
+
+    assert "Total Listings: 1" in mock_ctx.send.call_args[1]["content"]
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_deny_discards_speculative_work(
+    mock_ctx: MagicMock, services: Services
+) -> None:
+    scrape_started = asyncio.Event()
+    scrape_cancelled = asyncio.Event()
+
+    async def scrape(*args: object, **kwargs: object) -> ListingBatch:
+        scrape_started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            scrape_cancelled.set()
+            raise
+        return ListingBatch()
+
+    async def moderate(ctx: object, query: str) -> bool:
+        await scrape_started.wait()
+        return False
+
+    with (
+        patch("vidya.bot.handle_moderation", moderate),
+        patch("vidya.bot.scrape_ebay", scrape),
+        patch("vidya.bot.bot.services.exchange.get_rate", AsyncMock(return_value=1.4)),
+    ):
+        await ebay_command(mock_ctx, query="bad query")
+        await asyncio.wait_for(scrape_cancelled.wait(), timeout=1)
+
+    mock_ctx.send.assert_not_called()
+    assert len(services.scrape_cache._results) == 0
+
+
+@pytest.mark.asyncio
+async def test_ebay_command_deny_keeps_warm_cache_entry(
+    mock_ctx: MagicMock, services: Services
+) -> None:
+    warm = ListingBatch(["PS5"], [299.99])
+    await services.scrape_cache.get_or_fetch("ps5", AsyncMock(return_value=warm))
+    scrape = AsyncMock()
+
+    with (
+        patch("vidya.bot.handle_moderation", AsyncMock(return_value=False)),
+        patch("vidya.bot.scrape_ebay", scrape),
+    ):
+        await ebay_command(mock_ctx, query="ps5")
+
+    scrape.assert_not_called()
+    assert services.scrape_cache.expires_in("ps5") is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", ["ps5", "h3r01n"])
+async def test_ebay_command_skips_speculation_for_certain_denials(
+    mock_ctx: MagicMock, services: Services, query: str
+) -> None:
+    mock_ctx.author.id = 42
+    if query == "ps5":
+        services.moderator.suspend_user(42, "spam")
+    scrape = AsyncMock()
+    get_rate = AsyncMock()
+
+    with (
+        patch("vidya.bot.scrape_ebay", scrape),
+        patch("vidya.bot.bot.services.exchange.get_rate", get_rate),
+    ):
+        await ebay_command(mock_ctx, query=query)
+
+    scrape.assert_not_called()
+    get_rate.assert_not_called()
+    mock_ctx.send.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_scrape_listings_uses_history(services: Services, tmp_path: Path) -> None:
+    stored = EbayListing(title="Old", price=50.0, url="https://www.ebay.com/itm/1")
+    fresh = EbayListing(title="New", price=80.0, url="https://www.ebay.com/itm/2")
+    services.history = ListingHistory(str(tmp_path / "history.db"))
+    services.history.record("test", [stored])
+    scrape = AsyncMock(return_value=ListingBatch.from_listings([fresh]))
+
+    with patch("vidya.bot.scrape_ebay", scrape):
+        listings = await scrape_listings(services, "test", 1, None)
+
+    assert scrape.call_args.kwargs["known"] == {"1"}
+    assert sorted(listing.title for listing in listings) == ["New", "Old"]
+
+
+def test_parse_compare_queries() -> None:
+    assert parse_compare_queries("rtx 3080 | RTX  3080 | rtx 3090 |") == (
+        ["rtx 3080", "rtx 3090"],
+        1,
+    )
+    assert parse_compare_queries("--pages 2 ps5 | xbox")[1] == 2
+
+    with pytest.raises(ValueError):
+        parse_compare_queries("rtx 3080")
+    with pytest.raises(ValueError):
+        parse_compare_queries(" | ".join(f"gpu {i}" for i in range(10)))
+
+
+@pytest.mark.asyncio
+async def test_ebaycompare_command(mock_ctx: MagicMock) -> None:
+    mock_ctx.send = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+    batches = {
+        "ps5": ListingBatch(["a", "b"], [100.0, 200.0]),
+        "xbox": ListingBatch(["c"], [50.0]),
+    }
+
+    async def scrape(query: str, **kwargs: object) -> ListingBatch:
+        if query == "switch":
+            raise EbayScraperError("blocked")
+        return batches[query]
+
+    get_rate = AsyncMock(return_value=1.5)
+    render = AsyncMock(return_value=b"chart")
+    with (
+        patch(
+            "vidya.bot.bot.services.moderator.check_content",
+            AsyncMock(return_value=ModerationResult(allowed=True)),
+        ),
+        patch("vidya.bot.scrape_ebay", scrape),
+        patch("vidya.bot.bot.services.exchange.get_rate", get_rate),
+        patch("vidya.bot.bot.services.render.render_comparison", render),
+        patch("discord.File", MagicMock(return_value=MagicMock(spec=File))),
+    ):
+        await ebaycompare_command(mock_ctx, query="ps5 | xbox | switch")
+
+    get_rate.assert_awaited_once()
+    series = render.call_args.args[0]
+    assert [label for label, _ in series] == ["ps5", "xbox"]
+    content = mock_ctx.send.call_args.kwargs["content"]
+    assert "$225.00" in content
+    assert "$75.00" in content
+    assert "switch  scrape failed" in content
+    assert "file" in mock_ctx.send.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_ebaycompare_command_fetches_through_workers(
+    mock_ctx: MagicMock,
+) -> None:
+    mock_ctx.send = AsyncMock(return_value=MagicMock(delete=AsyncMock()))
+    workers = MagicMock()
+    workers.listings = AsyncMock(
+        side_effect=[ListingBatch(["a"], [100.0]), EbayScraperError("blocked")]
+    )
+    scrape = AsyncMock()
+    with (
+        patch.object(bot, "workers", workers),
+        patch(
+            "vidya.bot.bot.services.moderator.check_content",
+            AsyncMock(return_value=ModerationResult(allowed=True)),
+        ),
+        patch("vidya.bot.scrape_ebay", scrape),
+        patch("vidya.bot.bot.services.exchange.get_rate", AsyncMock(return_value=1.0)),
+        patch(
+            "vidya.bot.bot.services.render.render_comparison",
+            AsyncMock(return_value=b"chart"),
+        ),
+        patch("discord.File", MagicMock(return_value=MagicMock(spec=File))),
+    ):
+        await ebaycompare_command(mock_ctx, query="ps5 | switch")
+
+    scrape.assert_not_called()
+    assert workers.listings.await_count == 2
+    content = mock_ctx.send.call_args.kwargs["content"]
+    assert "$100.00" in content
+    assert "switch  scrape failed" in content
+
+
+@pytest.mark.asyncio
+async def test_ebaycompare_command_denied(mock_ctx: MagicMock) -> None:
+    async def check_content(query: str, user_id: int) -> ModerationResult:
+        if query == "bad":
+            return ModerationResult(allowed=False, message="No.", reason="test")
+        return ModerationResult(allowed=True)
+
+    scrape = AsyncMock()
+    with (
+        patch("vidya.bot.bot.services.moderator.check_content", check_content),
+        patch("vidya.bot.scrape_ebay", scrape),
+    ):
+        await ebaycompare_command(mock_ctx, query="ps5 | bad")
+
+    mock_ctx.send.assert_called_once_with("No.")
+    scrape.assert_not_called()
+
+
+def test_format_perf_report() -> None:
+    metrics = MetricsRegistry()
+    assert "No commands" in format_perf_report(metrics)
+
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.observe("vidya_stage_seconds", seconds, stage="scrape")
+    metrics.inc("vidya_stage_errors_total", stage="scrape")
+
+    report = format_perf_report(metrics)
+
+    assert "scrape" in report
+    assert "200ms" in report
+    assert "300ms" in report
+
+
+@pytest.mark.asyncio
+async def test_perf_command_requires_admin(mock_ctx: MagicMock) -> None:
+    await perf_command_error(mock_ctx, commands.MissingPermissions(["administrator"]))
+    assert "administrators" in mock_ctx.send.call_args[0][0]
+
+    with pytest.raises(RuntimeError):
+        await perf_command_error(mock_ctx, RuntimeError("boom"))
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from vidya.cache import SingleFlight, TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expiry() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10.0, clock=clock)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert len(cache) == 0
+
+
+def test_ttl_cache_lru_eviction() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10.0)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert calls == 1
+    assert flight.coalesced == 4
+
+    assert await flight.do("key", fetch) == 42
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+
+    async def fetch() -> int:
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancel_only_without_waiters() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+    started = asyncio.Event()
+
+    async def fetch() -> int:
+        started.set()
+        await asyncio.sleep(10)
+        return 42
+
+    waiter = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    assert flight.cancel("key") is False
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert flight.cancel("key") is True
+    assert flight.cancel("missing") is False
+
+
+def test_ttl_cache_expires_in() -> None:
+    now = 0.0
+    cache: TTLCache[str, int] = TTLCache(ttl=10.0, clock=lambda: now)
+    cache.set("a", 1)
+
+    now = 4.0
+    assert cache.expires_in("a") == 6.0
+    assert cache.expires_in("b") is None
+    now = 10.0
+    assert cache.expires_in("a") is None
+    assert cache.hits == cache.misses == 0
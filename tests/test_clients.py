@@ -0,0 +1,34 @@
+import httpx
+import pytest
+
+from vidya.clients import HttpClientRegistry
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, text=request.url.host)
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_client_per_host() -> None:
+    async with HttpClientRegistry(transport=httpx.MockTransport(_handler)) as clients:
+        first = clients.get("https://www.ebay.com/sch/i.html?_nkw=a")
+        second = clients.get("https://www.ebay.com/sch/i.html?_nkw=b")
+        other = clients.get("https://api.exchangerate-api.com/v4/latest/USD")
+
+        assert first is second
+        assert first is not other
+
+        response = await other.get("https://api.exchangerate-api.com/v4/latest/USD")
+        assert response.text == "api.exchangerate-api.com"
+
+
+@pytest.mark.asyncio
+async def test_registry_closes_clients() -> None:
+    clients = HttpClientRegistry(transport=httpx.MockTransport(_handler))
+    client = clients.get("https://www.ebay.com/")
+
+    await clients.aclose()
+
+    assert client.is_closed
+    assert clients.get("https://www.ebay.com/") is not client
+    await clients.aclose()
@@ -0,0 +1,55 @@
+import time
+from pathlib import Path
+
+from vidya.history import ListingHistory
+from vidya.scraper import EbayListing
+
+
+def _listing(item_id: int, price: float = 10.0) -> EbayListing:
+    return EbayListing(
+        title=f"Item {item_id}",
+        price=price,
+        url=f"https://www.ebay.com/itm/{item_id}?hash=abc",
+    )
+
+
+def test_listing_history_deduplicates_by_item(tmp_path: Path) -> None:
+    history = ListingHistory(str(tmp_path / "history.db"))
+
+    assert history.record("RTX 3080", [_listing(1), _listing(2)]) == 2
+    assert history.record("rtx  3080", [_listing(2), _listing(3)]) == 1
+    history.record("rtx 3080", [EbayListing(title="No link", price=5.0)])
+
+    assert history.known_keys("rtx 3080") == {"1", "2", "3"}
+    assert len(history.listings("rtx 3080")) == 3
+    assert history.listings("rtx 3090") == []
+    history.close()
+
+
+def test_listing_history_expires_old_listings(tmp_path: Path) -> None:
+    path = str(tmp_path / "history.db")
+    history = ListingHistory(path, max_age=60.0)
+    history.record("ps5", [_listing(1)], scraped_at=time.time() - 120.0)
+    history.record("ps5", [_listing(2)])
+
+    assert history.known_keys("ps5") == {"2"}
+    assert [listing.title for listing in history.listings("ps5")] == ["Item 2"]
+    history.close()
+
+    reopened = ListingHistory(path, max_age=60.0)
+    assert reopened.known_keys("ps5") == {"2"}
+    reopened.close()
+
+
+def test_listing_history_shares_the_file_between_writers(tmp_path: Path) -> None:
+    path = str(tmp_path / "history.db")
+    first = ListingHistory(path)
+    second = ListingHistory(path)
+
+    first.record("ps5", [_listing(1)])
+    second.record("ps5", [_listing(2)])
+
+    assert first._db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert first.known_keys("ps5") == second.known_keys("ps5") == {"1", "2"}
+    first.close()
+    second.close()
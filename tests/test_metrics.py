@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from vidya.metrics import Histogram, MetricsRegistry, MetricsServer
+
+
+def test_histogram_quantiles() -> None:
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.observe(float(value))
+
+    assert histogram.quantiles() == [50.0, 95.0, 99.0]
+    assert histogram.count == 100
+    assert histogram.total == 5050.0
+
+
+def test_histogram_keeps_recent_window() -> None:
+    histogram = Histogram(window=10)
+    for value in range(100):
+        histogram.observe(float(value))
+
+    assert histogram.quantiles((0.0,)) == [90.0]
+    assert histogram.count == 100
+
+
+def test_span_records_latency_and_errors() -> None:
+    metrics = MetricsRegistry()
+
+    with metrics.span("parse"):
+        pass
+    with pytest.raises(ValueError), metrics.span("parse"):
+        raise ValueError("bad page")
+
+    assert metrics.histogram("vidya_stage_seconds", stage="parse").count == 2
+    assert metrics.counter_value("vidya_stage_errors_total", stage="parse") == 1
+
+
+def test_render_prometheus() -> None:
+    metrics = MetricsRegistry()
+    metrics.inc("vidya_commands_total", outcome="ok")
+    metrics.gauge("vidya_ebay_queue_depth", lambda: 3)
+    metrics.counter("vidya_cache_hits_total", lambda: 7, cache="scrape")
+    metrics.observe("vidya_payload_bytes", 2048, kind='chart "png"')
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE vidya_commands_total counter" in text
+    assert 'vidya_commands_total{outcome="ok"} 1.0' in text
+    assert "vidya_ebay_queue_depth 3.0" in text
+    assert "# TYPE vidya_cache_hits_total counter" in text
+    assert 'vidya_cache_hits_total{cache="scrape"} 7.0' in text
+    assert 'vidya_payload_bytes{kind="chart \\"png\\"",quantile="0.99"} 2048' in text
+    assert 'vidya_payload_bytes_count{kind="chart \\"png\\""} 1' in text
+
+
+def test_collect_and_merge_ship_metrics_between_registries() -> None:
+    worker = MetricsRegistry()
+    worker.inc("vidya_stage_errors_total", stage="fetch")
+    worker.observe("vidya_stage_seconds", 0.5, stage="fetch")
+    worker.gauge("vidya_ebay_queue_depth", lambda: 3)
+    worker.counter("vidya_ebay_requests_total", lambda: 5)
+    front = MetricsRegistry()
+    front.observe("vidya_stage_seconds", 1.5, stage="fetch")
+
+    front.merge(worker.collect(), worker="0")
+    front.merge(worker.collect(), worker="0")
+
+    histogram = front.histogram("vidya_stage_seconds", stage="fetch")
+    assert histogram.count == 2
+    assert histogram.total == 2.0
+    assert front.counter_value("vidya_stage_errors_total", stage="fetch") == 1
+    text = front.render_prometheus()
+    assert 'vidya_ebay_queue_depth{worker="0"} 3.0' in text
+    assert "# TYPE vidya_ebay_requests_total counter" in text
+    assert 'vidya_ebay_requests_total{worker="0"} 5.0' in text
+    assert worker.histogram("vidya_stage_seconds", stage="fetch") is None
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_prometheus_text() -> None:
+    metrics = MetricsRegistry()
+    metrics.inc("vidya_commands_total", outcome="ok")
+    server = MetricsServer(metrics, port=0)
+    await server.start()
+
+    async def get(path: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response
+
+    try:
+        metrics_response = await get("/metrics")
+        missing_response = await get("/")
+    finally:
+        await server.aclose()
+
+    assert metrics_response.startswith(b"HTTP/1.1 200 OK")
+    assert b'vidya_commands_total{outcome="ok"} 1.0' in metrics_response
+    assert missing_response.startswith(b"HTTP/1.1 404")
@@ -1,9 +1,30 @@
+import asyncio
+import json
 from datetime import datetime, timedelta
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from vidya.moderation import ContentModerator, SuspendedUser
+from vidya.moderation import (
+    _FALLBACK_SUSPENSION_MESSAGE,
+    ContentModerator,
+    ModerationBatcher,
+    SuspendedUser,
+    SuspensionMessagePool,
+    SuspensionStore,
+    Verdict,
+    VerdictCache,
+)
+from vidya.prefilter import QueryPrefilter
+
+
+def _completion(*contents: str) -> MagicMock:
+    completion = MagicMock()
+    completion.choices = [
+        MagicMock(message=MagicMock(content=content)) for content in contents
+    ]
+    return completion
 
 
 @pytest.mark.asyncio
@@ -46,19 +67,12 @@ async def test_check_content_allowed() -> None:
 
 @pytest.mark.asyncio
 async def test_check_content_denied() -> None:
-    mock_completion = MagicMock()
-    mock_completion.choices = [
-        MagicMock(message=MagicMock(content="DENY: inappropriate content"))
-    ]
-
-    mock_suspension_completion = MagicMock()
-    mock_suspension_completion.choices = [
-        MagicMock(message=MagicMock(content="You've been suspended!"))
-    ]
-
     mock_client = MagicMock()
     mock_client.chat.completions.create = AsyncMock(
-        side_effect=[mock_completion, mock_suspension_completion]
+        side_effect=[
+            _completion("DENY: inappropriate content"),
+            _completion("You've been suspended!"),
+        ]
     )
 
     with patch("openai.AsyncOpenAI", return_value=mock_client):
@@ -71,7 +85,9 @@ async def test_check_content_denied() -> None:
         assert result.message is not None
         assert result.reason == "inappropriate content"
 
-        assert mock_client.chat.completions.create.call_count == 2
+        # the reply comes from the pool; generation happens in the background
+        assert mock_client.chat.completions.create.call_count == 1
+        await moderator.aclose()
 
 
 def test_suspended_user_expiry() -> None:
@@ -89,3 +105,250 @@ def test_suspended_user_expiry() -> None:
 
     assert expired_user.is_expired()
     assert expired_user.minutes_remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_check_content_uses_cached_allow() -> None:
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_completion("ALLOW"))
+
+    moderator = ContentModerator(VerdictCache())
+    moderator.client = mock_client
+
+    assert (await moderator.check_content("PS5", 1)).allowed
+    assert (await moderator.check_content("  ps5 ", 2)).allowed
+
+    mock_client.chat.completions.create.assert_called_once()
+    assert moderator.verdicts.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_check_content_cached_deny_suspends_user() -> None:
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(
+        side_effect=[
+            _completion("DENY: inappropriate content"),
+            _completion("Go away", "Go away again"),
+        ]
+    )
+
+    moderator = ContentModerator(VerdictCache())
+    moderator.client = mock_client
+
+    await moderator.check_content("bad query", 1)
+    result = await moderator.check_content("bad query", 2)
+
+    assert result.allowed is False
+    assert result.reason == "inappropriate content"
+    assert 2 in moderator.suspended_users
+    # the second deny is served from the cache without another evaluation
+    assert mock_client.chat.completions.create.call_count == 1
+    await moderator.aclose()
+
+
+def test_verdict_cache_ttls() -> None:
+    cache = VerdictCache(allow_ttl=60.0, deny_ttl=0.0)
+
+    cache.set("safe", Verdict(allowed=True))
+    cache.set("unsafe", Verdict(allowed=False, reason="nope"))
+
+    assert cache.get("safe") == Verdict(allowed=True)
+    assert cache.get("unsafe") is None
+
+
+def test_verdict_cache_persists_to_sqlite(tmp_path: Path) -> None:
+    path = str(tmp_path / "verdicts.db")
+
+    cache = VerdictCache(path=path)
+    cache.set("unsafe", Verdict(allowed=False, reason="nope"))
+    cache.close()
+
+    reopened = VerdictCache(path=path)
+    assert reopened.get("unsafe") == Verdict(allowed=False, reason="nope")
+    assert reopened.get("missing") is None
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_check_content_prefilter_denies_without_api_call() -> None:
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_completion("Go away"))
+
+    moderator = ContentModerator(VerdictCache(), QueryPrefilter())
+    moderator.client = mock_client
+
+    result = await moderator.check_content("h3r01n", 1)
+
+    assert result.allowed is False
+    assert result.reason == "Blocked term: heroin"
+    assert result.message
+    assert 1 not in moderator.suspended_users
+    mock_client.chat.completions.create.assert_not_called()
+    assert moderator.verdicts.misses == 0
+    await moderator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_check_content_sends_ambiguous_terms_to_the_model() -> None:
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_completion("ALLOW"))
+
+    moderator = ContentModerator(VerdictCache(), QueryPrefilter(), batch_size=1)
+    moderator.client = mock_client
+
+    result = await moderator.check_content("mazda miata lsd", 1)
+
+    assert result.allowed is True
+    assert 1 not in moderator.suspended_users
+    mock_client.chat.completions.create.assert_called_once()
+    await moderator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_check_content_prefilter_allows_without_api_call() -> None:
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock()
+
+    moderator = ContentModerator(prefilter=QueryPrefilter())
+    moderator.client = mock_client
+
+    assert (await moderator.check_content("Nintendo Switch OLED", 1)).allowed
+    mock_client.chat.completions.create.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_content_batches_concurrent_queries() -> None:
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=_completion(
+            json.dumps({"verdicts": ["ALLOW", "DENY: counterfeit", "ALLOW"]})
+        )
+    )
+    moderator = ContentModerator(batch_window=0.01)
+    moderator.client = mock_client
+
+    results = await asyncio.gather(
+        moderator.check_content("vintage camera", 1),
+        moderator.check_content("fake watch", 2),
+        moderator.check_content("Vintage  Camera", 3),
+        moderator.check_content("retro console", 4),
+    )
+
+    assert [result.allowed for result in results] == [True, False, True, True]
+    assert results[1].reason == "counterfeit"
+    call_args = mock_client.chat.completions.create.call_args_list[0]
+    assert json.loads(call_args.kwargs["messages"][1]["content"]) == [
+        "vintage camera",
+        "fake watch",
+        "retro console",
+    ]
+    assert moderator.batcher.batches == 1
+    assert moderator.batcher.batched_queries == 3
+    await moderator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_moderation_batcher_falls_back_per_query() -> None:
+    async def evaluate_batch(queries: list[str]) -> list[Verdict | None]:
+        return [Verdict(allowed=True), None, Verdict(allowed=True)]
+
+    evaluate_one = AsyncMock(return_value=Verdict(allowed=False, reason="nope"))
+    batcher = ModerationBatcher(evaluate_batch, evaluate_one, max_size=3)
+
+    verdicts = await asyncio.gather(
+        batcher.submit("one"), batcher.submit("two"), batcher.submit("three")
+    )
+
+    assert [verdict.allowed for verdict in verdicts] == [True, False, True]
+    evaluate_one.assert_awaited_once_with("two")
+    assert batcher.fallbacks == 1
+
+    failing = ModerationBatcher(
+        AsyncMock(side_effect=ValueError("bad json")), evaluate_one, window=0.01
+    )
+    verdicts = await asyncio.gather(failing.submit("one"), failing.submit("two"))
+
+    assert [verdict.reason for verdict in verdicts] == ["nope", "nope"]
+    assert failing.fallbacks == 2
+    await batcher.aclose()
+    await failing.aclose()
+
+
+@pytest.mark.asyncio
+async def test_suspension_message_pool_serves_and_refills() -> None:
+    generate = AsyncMock(side_effect=[["one", "two", "three"], ["four", "five"]])
+    pool = SuspensionMessagePool(generate, size=3, low_water=1)
+
+    assert pool.take() == _FALLBACK_SUSPENSION_MESSAGE
+    await asyncio.sleep(0)
+    assert len(pool) == 3
+    generate.assert_awaited_once_with(3)
+
+    assert pool.take() == "one"
+    assert pool.take() == "two"
+    await asyncio.sleep(0)
+    assert len(pool) == 3
+    generate.assert_awaited_with(2)
+
+    assert pool.served == 2
+    assert pool.fallbacks == 1
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_suspension_message_pool_survives_generation_errors() -> None:
+    generate = AsyncMock(side_effect=RuntimeError("api down"))
+    pool = SuspensionMessagePool(generate, size=2)
+
+    pool.refill()
+    await asyncio.sleep(0)
+
+    assert len(pool) == 0
+    assert pool.take() == _FALLBACK_SUSPENSION_MESSAGE
+    await pool.aclose()
+
+
+def test_suspension_store_sweeps_expired_entries() -> None:
+    now = 1000.0
+    store = SuspensionStore(clock=lambda: now)
+
+    store.suspend(1, "spam", 60.0)
+    store.suspend(2, "spam", 120.0)
+    store.suspend(1, "spam again", 300.0)
+
+    now = 1200.0
+    assert store.sweep() == 1
+    assert 2 not in store
+    assert store.get(1).reason == "spam again"
+    assert len(store) == 1
+
+    now = 2000.0
+    assert store.get(1) is None
+    assert len(store) == 0
+
+
+def test_suspension_store_persists_to_sqlite(tmp_path: Path) -> None:
+    path = str(tmp_path / "suspensions.db")
+
+    store = SuspensionStore(path=path)
+    store.suspend(1, "spam", 3600.0)
+    store.suspend(2, "gone", -1.0)
+    asyncio.run(store.aclose())
+
+    reopened = SuspensionStore(path=path)
+    assert 1 in reopened
+    assert reopened.get(1).minutes_remaining >= 59
+    assert len(reopened) == 1
+    asyncio.run(reopened.aclose())
+
+
+@pytest.mark.asyncio
+async def test_suspension_store_background_sweep() -> None:
+    store = SuspensionStore(sweep_interval=0.01)
+    store.suspend(1, "spam", 0.02)
+
+    store.start()
+    await asyncio.sleep(0.1)
+
+    assert len(store) == 0
+    await store.aclose()
@@ -0,0 +1,66 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from vidya.prefetch import DecayingCounter, QueryPrefetcher
+
+
+def test_decaying_counter_halves_scores() -> None:
+    now = 0.0
+    counter: DecayingCounter[str] = DecayingCounter(half_life=10.0, clock=lambda: now)
+
+    counter.add("ps5")
+    counter.add("ps5")
+    counter.add("xbox")
+
+    now = 10.0
+    assert counter.score("ps5") == pytest.approx(1.0)
+    assert counter.score("xbox") == pytest.approx(0.5)
+    assert counter.add("xbox") == pytest.approx(1.5)
+    assert [key for key, _ in counter.top(2)] == ["xbox", "ps5"]
+
+
+def test_decaying_counter_prunes_cold_keys() -> None:
+    counter: DecayingCounter[int] = DecayingCounter(max_keys=4)
+
+    for key in range(4):
+        counter.add(key, amount=key + 1)
+    counter.add(99, amount=10)
+
+    assert len(counter) == 2
+    assert [key for key, _ in counter.top(5)] == [99, 3]
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_refreshes_hot_queries_within_budget() -> None:
+    prefetcher = QueryPrefetcher(top_k=5, budget=3, min_score=2.0)
+    for count, query in [(3, "RTX 3080"), (4, "ps5"), (5, "switch")]:
+        for _ in range(count):
+            prefetcher.record(query, pages=2 if query == "RTX 3080" else 1)
+    prefetcher.record("one-off")
+    refresh = AsyncMock()
+
+    spent = await prefetcher.run_once(refresh, lambda query, pages: None, lambda: True)
+
+    refreshed = sorted(call.args for call in refresh.await_args_list)
+    assert spent == 2
+    # the two-page query no longer fits the budget and the one-off is too cold
+    assert refreshed == [("ps5", 1), ("switch", 1)]
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_skips_warm_entries_and_busy_scheduler() -> None:
+    prefetcher = QueryPrefetcher(min_score=0.5, interval=60.0)
+    prefetcher.record("ps5")
+    prefetcher.record("xbox")
+    refresh = AsyncMock(side_effect=RuntimeError("eBay down"))
+
+    def expires_in(query: str, pages: int) -> float | None:
+        return 600.0 if query == "ps5" else 30.0
+
+    assert await prefetcher.run_once(refresh, expires_in, lambda: False) == 0
+    refresh.assert_not_awaited()
+
+    assert await prefetcher.run_once(refresh, expires_in, lambda: True) == 1
+    refresh.assert_awaited_once_with("xbox", 1)
+    assert prefetcher.failures == 1
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+
+from vidya.prefilter import AhoCorasick, QueryPrefilter, load_terms
+
+
+def test_aho_corasick_finds_overlapping_patterns() -> None:
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+
+    matches = sorted(matcher.iter_matches("ushers"))
+
+    assert matches == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+@pytest.mark.parametrize(
+    ("query", "term"),
+    [
+        ("heroin", "heroin"),
+        ("F3NT4NYL bulk", "fentanyl"),
+        ("p o r n magazine", "porn"),
+        ("fake   ID card", "fake id"),
+    ],
+)
+def test_prefilter_denies_obvious_terms(query: str, term: str) -> None:
+    result = QueryPrefilter().check(query)
+
+    assert result is not None
+    assert result.allowed is False
+    assert result.term == term
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "mazda miata lsd",
+        "LSD differential",
+        "nazi germany ww2 medal",
+        "meth lab breaking bad funko",
+        "nintendo switch f.u.c.k",
+    ],
+)
+def test_prefilter_sends_ambiguous_terms_to_review(query: str) -> None:
+    prefilter = QueryPrefilter()
+
+    assert prefilter.check(query) is None
+    assert prefilter.escalations == 1
+
+
+def test_prefilter_respects_word_boundaries() -> None:
+    prefilter = QueryPrefilter(deny_terms=["ass"], allow_terms=["class", "ring"])
+
+    result = prefilter.check("class ring")
+
+    assert result is not None
+    assert result.allowed is True
+
+
+@pytest.mark.parametrize(
+    "query", ["Nintendo Switch OLED", "rtx 4090", "ps5 digital edition bundle"]
+)
+def test_prefilter_allows_covered_queries(query: str) -> None:
+    result = QueryPrefilter().check(query)
+
+    assert result is not None
+    assert result.allowed is True
+
+
+@pytest.mark.parametrize(
+    "query", ["1488", "14 88", "88", "white power", "super white one", "new 88"]
+)
+def test_prefilter_escalates_queries_without_a_specific_term(query: str) -> None:
+    prefilter = QueryPrefilter()
+
+    assert prefilter.check(query) is None
+    assert prefilter.local_allows == 0
+
+
+def test_prefilter_escalates_unknown_queries() -> None:
+    prefilter = QueryPrefilter()
+
+    assert prefilter.check("vintage kitchen knife") is None
+    assert prefilter.check("nintendo switch") is not None
+    assert prefilter.check("fentanyl") is not None
+
+    assert prefilter.escalations == 1
+    assert prefilter.local_allows == 1
+    assert prefilter.local_denies == 1
+    assert prefilter.resolved_fraction == pytest.approx(2 / 3)
+
+
+def test_load_terms_skips_comments_and_blanks(tmp_path: Path) -> None:
+    path = tmp_path / "deny.txt"
+    path.write_text("# banned\nfoo\n\n  bar baz  \n", encoding="utf-8")
+
+    assert load_terms(str(path)) == ["foo", "bar baz"]
@@ -0,0 +1,162 @@
+import asyncio
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from vidya.render import (
+    ChartOptions,
+    RenderQueueFullError,
+    RenderService,
+    RenderTimeoutError,
+    comparison_sparklines,
+    create_comparison_visualization,
+    create_price_visualization,
+    price_sparkline,
+)
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def test_create_price_visualization() -> None:
+    png = create_price_visualization([100.0, 200.0, 300.0], 1.5)
+    assert png.startswith(PNG_MAGIC)
+
+
+@pytest.mark.parametrize("backend", ["matplotlib", "raster"])
+def test_chart_formats(backend: str) -> None:
+    prices = [float(price) for price in range(10, 500, 7)]
+
+    png = create_price_visualization(prices, 1.5, ChartOptions(backend, "png", 50))
+    palette = create_price_visualization(
+        prices, 1.5, ChartOptions(backend, "palette_png", 50)
+    )
+    webp = create_price_visualization(prices, 1.5, ChartOptions(backend, "webp", 50))
+
+    assert png.startswith(PNG_MAGIC)
+    assert palette.startswith(PNG_MAGIC)
+    assert webp[:4] == b"RIFF"
+    assert webp[8:12] == b"WEBP"
+
+
+def test_raster_chart_single_price() -> None:
+    png = create_price_visualization([42.0], 1.5, ChartOptions("raster", dpi=50))
+    assert png.startswith(PNG_MAGIC)
+
+
+def test_price_sparkline() -> None:
+    sparkline = price_sparkline([100.0, 100.0, 100.0, 200.0], 1.5, bins=4)
+    assert sparkline == "```\n$150.00 █  ▃ $300.00\n```"
+
+
+@pytest.mark.parametrize("backend", ["matplotlib", "raster"])
+def test_create_comparison_visualization(backend: str) -> None:
+    series = [("ps5", [100.0, 200.0, 300.0]), ("xbox", [50.0, 75.0])]
+    png = create_comparison_visualization(series, 1.5, ChartOptions(backend, dpi=50))
+    assert png.startswith(PNG_MAGIC)
+
+
+def test_comparison_sparklines() -> None:
+    lines = comparison_sparklines([("a", [1.0, 1.0]), ("bb", [2.0])], 1.0, bins=2)
+    assert lines.splitlines()[1:3] == ["a  █ ", "bb  █"]
+
+
+@pytest.mark.asyncio
+async def test_render_comparison_cache() -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = RenderService(executor=executor)
+        with patch(
+            "vidya.render.create_comparison_visualization", return_value=b"png"
+        ) as mock_render:
+            await service.render_comparison([("a", [1.0]), ("b", [2.0])], 1.5)
+            await service.render_comparison([("a", [1.0]), ("b", [2.0])], 1.5)
+            await service.render_comparison([("b", [1.0]), ("a", [2.0])], 1.5)
+
+        assert mock_render.call_count == 2
+
+
+def test_chart_options_validation() -> None:
+    assert ChartOptions(image_format="webp").filename == "price_distribution.webp"
+    with pytest.raises(ValueError):
+        ChartOptions(backend="svg")
+    with pytest.raises(ValueError):
+        ChartOptions(image_format="gif")
+
+
+@pytest.mark.asyncio
+async def test_render_in_process_pool() -> None:
+    service = RenderService(workers=1)
+    try:
+        png = await service.render([100.0, 200.0, 300.0], 1.5)
+        assert png.startswith(PNG_MAGIC)
+    finally:
+        service.close()
+
+
+def test_raster_worker_skips_matplotlib() -> None:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from vidya.render import _init_worker; "
+            "_init_worker('raster'); print('matplotlib' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+@pytest.mark.asyncio
+async def test_render_cache_hit() -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = RenderService(executor=executor)
+        with patch(
+            "vidya.render.create_price_visualization", return_value=b"png"
+        ) as mock_render:
+            first = await service.render([1.0, 2.0], 1.5)
+            second = await service.render([1.0, 2.0], 1.5)
+            await service.render([1.0, 2.0], 1.4)
+
+        assert first == second == b"png"
+        assert mock_render.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_render_timeout() -> None:
+    def slow_render(*args: object) -> bytes:
+        time.sleep(0.2)
+        return b"png"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = RenderService(executor=executor, timeout=0.01, max_pending=1)
+        with patch("vidya.render.create_price_visualization", slow_render):
+            with pytest.raises(RenderTimeoutError):
+                await service.render([1.0, 2.0], 1.5)
+            # the abandoned job still occupies the pool, so it keeps its slot
+            assert service.pending == 1
+            with pytest.raises(RenderQueueFullError):
+                await service.render([3.0], 1.5)
+
+            await asyncio.sleep(0.3)
+            assert service.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_render_queue_full() -> None:
+    def slow_render(*args: object) -> bytes:
+        time.sleep(0.1)
+        return b"png"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = RenderService(executor=executor, max_pending=1)
+        with patch("vidya.render.create_price_visualization", slow_render):
+            first = asyncio.create_task(service.render([1.0], 1.5))
+            await asyncio.sleep(0)
+            with pytest.raises(RenderQueueFullError):
+                await service.render([2.0], 1.5)
+            assert await first == b"png"
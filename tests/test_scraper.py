@@ -1,36 +1,523 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import pickle
 
 import httpx
+import numpy as np
 import pytest
+from selectolax.lexbor import LexborHTMLParser
 
-from vidya.scraper import scrape_ebay
+from tests.fixtures import ebay_page_names, load_ebay_page
+from vidya.clients import HttpClientRegistry
+from vidya.scraper import (
+    _PLACEHOLDER_ITEMS,
+    PAGE_SIZE,
+    EbayListing,
+    EbayScraperError,
+    ListingBatch,
+    RateLimitError,
+    RequestScheduler,
+    ScrapeCache,
+    build_ebay_url,
+    create_parse_executor,
+    extract_listings,
+    is_robot_check,
+    listing_key,
+    parse_ebay_listings,
+    parse_listing,
+    scrape_ebay,
+    until_known,
+)
+
+MOCK_HTML = """
+<div>
+    <ul>
+        <li class="s-item">
+            <h3 class="s-item__title">Test Item</h3>
+            <span class="s-item__price">$100.00</span>
+            <a class="s-item__link" href="http://test.com">Link</a>
+        </li>
+    </ul>
+</div>
+"""
 
 
 @pytest.mark.asyncio
 async def test_scrape_ebay_success() -> None:
-    mock_html = """
-    <div>
-        <ul>
-            <li class="s-item">
-                <h3 class="s-item__title">Test Item</h3>
-                <span class="s-item__price">$100.00</span>
-                <a class="s-item__link" href="http://test.com">Link</a>
-            </li>
-        </ul>
-    </div>
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, text=MOCK_HTML)
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        results = await scrape_ebay("test query", clients=clients)
+
+    assert len(requests) == 1
+    assert requests[0].url.host == "www.ebay.com"
+    assert len(results) >= 0
+    if results:
+        assert results[0].title == "Test Item"
+        assert results[0].price == 100.0
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_robot_check() -> None:
+    attempts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        return httpx.Response(200, text="<html>Robot Check</html>")
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        with pytest.raises(RateLimitError):
+            await scrape_ebay("test query", delay=0, clients=clients)
+
+    assert attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_backs_off_through_scheduler() -> None:
+    responses = iter(
+        [httpx.Response(429), httpx.Response(200, text="<html>Robot Check</html>")]
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return next(responses, httpx.Response(200, text=MOCK_HTML))
+
+    scheduler = RequestScheduler(rate=100.0, backoff_base=0.01)
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        results = await scrape_ebay(
+            "test query", clients=clients, scheduler=scheduler, guild_id=1
+        )
+
+    assert results == []
+    assert scheduler.throttled == 2
+    assert scheduler.requests == 3
+    assert scheduler.current_rate < 100.0
+
+
+@pytest.mark.asyncio
+async def test_request_scheduler_token_bucket() -> None:
+    scheduler = RequestScheduler(rate=100.0, burst=1, max_concurrency=10)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def request() -> None:
+        async with scheduler.slot():
+            pass
+
+    await asyncio.gather(*(request() for _ in range(5)))
+
+    assert loop.time() - started >= 0.035
+    assert scheduler.requests == 5
+    assert scheduler.max_wait > 0
+    assert scheduler.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_request_scheduler_caps_concurrency() -> None:
+    scheduler = RequestScheduler(rate=1000.0, burst=100, max_concurrency=2)
+    peak = 0
+
+    async def request() -> None:
+        nonlocal peak
+        async with scheduler.slot():
+            peak = max(peak, scheduler.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_request_scheduler_round_robins_guilds() -> None:
+    scheduler = RequestScheduler(rate=1000.0, burst=100, max_concurrency=1)
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def request(name: str, guild: int) -> None:
+        async with scheduler.slot(guild):
+            order.append(name)
+            if name == "first":
+                await release.wait()
+
+    first = asyncio.create_task(request("first", 0))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(request(name, guild))
+        for name, guild in [("a1", 1), ("a2", 1), ("a3", 1), ("b1", 2)]
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 4
+
+    release.set()
+    await asyncio.gather(first, *tasks)
+
+    assert order == ["first", "a1", "b1", "a2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_request_scheduler_circuit_breaker() -> None:
+    scheduler = RequestScheduler(rate=10.0, backoff_base=0.05)
+
+    scheduler.record_throttle()
+    assert scheduler.circuit_open
+    assert not scheduler.idle
+    assert scheduler.current_rate == 5.0
+
+    await asyncio.sleep(0.06)
+    assert not scheduler.circuit_open
+    assert scheduler.idle
+
+    for _ in range(10):
+        scheduler.record_success()
+    assert scheduler.current_rate == 10.0
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_retries_http_errors() -> None:
+    attempts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        return httpx.Response(503)
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        with pytest.raises(EbayScraperError):
+            await scrape_ebay("test query", retries=2, delay=0, clients=clients)
+
+    assert attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_scrape_cache_coalesces_and_caches() -> None:
+    cache = ScrapeCache(maxsize=8, ttl=60.0)
+    calls = 0
+
+    async def fetch() -> list[EbayListing]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [EbayListing(title="Test Item", price=100.0)]
+
+    results = await asyncio.gather(
+        cache.get_or_fetch("RTX  3080", fetch),
+        cache.get_or_fetch("rtx 3080", fetch),
+    )
+    cached = await cache.get_or_fetch(" rtx 3080 ", fetch)
+
+    assert calls == 1
+    assert results[0] == results[1] == cached
+    assert cache.coalesced == 1
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_scrape_cache_does_not_store_errors() -> None:
+    cache = ScrapeCache()
+
+    async def failing_fetch() -> list[EbayListing]:
+        raise EbayScraperError("boom")
+
+    async def fetch() -> list[EbayListing]:
+        return []
+
+    with pytest.raises(EbayScraperError):
+        await cache.get_or_fetch("test", failing_fetch)
+    assert await cache.get_or_fetch("test", fetch) == []
+
+
+@pytest.mark.asyncio
+async def test_scrape_cache_refresh_replaces_entry() -> None:
+    cache = ScrapeCache(ttl=60.0)
+    prices = iter([100.0, 120.0])
+
+    async def fetch() -> list[EbayListing]:
+        return [EbayListing(title="Test Item", price=next(prices))]
+
+    assert cache.expires_in("test") is None
+    await cache.get_or_fetch("test", fetch)
+    refreshed = await cache.refresh("TEST", fetch)
+
+    assert refreshed[0].price == 120.0
+    assert (await cache.get_or_fetch("test", fetch))[0].price == 120.0
+    assert 0 < cache.expires_in("test") <= 60.0
+
+
+def _results_page(urls: list[str]) -> str:
+    items = [
+        f"""
+        <li class="s-item">
+            <h3 class="s-item__title">Item {url}</h3>
+            <span class="s-item__price">$10.00</span>
+            <a class="s-item__link" href="{url}">Link</a>
+        </li>
+        """
+        for url in ["placeholder-1", "placeholder-2", *urls]
+    ]
+    return f"<ul>{''.join(items)}</ul>"
+
+
+def test_build_ebay_url_page() -> None:
+    assert "_pgn" not in build_ebay_url("test")
+    assert build_ebay_url("test", page=3).endswith("&_pgn=3")
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_multiple_pages() -> None:
+    active = 0
+    peak = 0
+    requested: list[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        page = int(request.url.params.get("_pgn", "1"))
+        requested.append(page)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        # page 2 repeats the last listing of page 1 under a fresh tracking hash
+        first = (page - 1) * PAGE_SIZE - (1 if page == 2 else 0)
+        urls = [
+            f"https://www.ebay.com/itm/{i}?hash=item{i}p{page}&amdata=enc%3A{page}"
+            for i in range(first, first + PAGE_SIZE)
+        ]
+        return httpx.Response(200, text=_results_page(urls))
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        results = await scrape_ebay("test", clients=clients, pages=3, concurrency=2)
+
+    assert sorted(requested) == [1, 2, 3]
+    assert peak == 2
+    assert len(results) == 3 * PAGE_SIZE - 1
+    assert len({listing_key(listing) for listing in results}) == len(results)
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_stops_after_short_page() -> None:
+    requested: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("_pgn", "1"))
+        requested.append(page)
+        count = PAGE_SIZE if page == 1 else 10
+        urls = [f"http://item/{page}/{i}" for i in range(count)]
+        return httpx.Response(200, text=_results_page(urls))
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        results = await scrape_ebay("test", clients=clients, pages=5, concurrency=1)
+
+    assert requested == [1, 2]
+    assert len(results) == PAGE_SIZE + 10
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_multiple_pages_error() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("_pgn") == "2":
+            return httpx.Response(200, text="Robot Check")
+        urls = [f"http://item/{i}" for i in range(PAGE_SIZE)]
+        return httpx.Response(200, text=_results_page(urls))
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        with pytest.raises(EbayScraperError):
+            await scrape_ebay("test", delay=0, clients=clients, pages=3, concurrency=3)
+
+
+def test_extract_listings_full_page() -> None:
+    listings = extract_listings(load_ebay_page("synthetic_sold_full_page.html"))
+
+    assert len(listings) == PAGE_SIZE
+    assert all(listing.url and listing.price > 0 for listing in listings)
+    assert "Shop on eBay" not in {listing.title for listing in listings}
+
+
+def test_extract_listings_stops_at_fewer_words() -> None:
+    html = load_ebay_page("synthetic_sold_fewer_words.html")
+
+    assert len(extract_listings(html)) == 45
+    assert len(extract_listings(html.decode())) == 45
+
+
+@pytest.mark.parametrize("name", ebay_page_names())
+def test_extract_listings_matches_selector_reading(name: str) -> None:
+    # a plain selector pass over the page, independent of the sibling walk, so
+    # captured_*.html pages check the walk against real eBay markup
+    html = load_ebay_page(name)
+    head = html.decode().split("Results matching fewer words")[0]
+    items = LexborHTMLParser(head).css("li.s-item")[_PLACEHOLDER_ITEMS:]
+    expected = [listing for item in items if (listing := parse_listing(item))]
+
+    assert extract_listings(html) == expected
+    assert expected
+
+
+def test_extract_listings_fewer_words_first() -> None:
+    html = """
+    <ul>
+        <li class="srp-river-answer"><h3>Results matching fewer words</h3></li>
+        <li class="s-item">
+            <h3 class="s-item__title">Loose Match</h3>
+            <span class="s-item__price">$100.00</span>
+        </li>
+    </ul>
+    """
+    assert extract_listings(html) == []
+
+
+def _item(item_id: int) -> str:
+    return f"""
+    <li class="s-item">
+        <h3 class="s-item__title">Item {item_id}</h3>
+        <span class="s-item__price">$10.00</span>
+        <a class="s-item__link" href="https://www.ebay.com/itm/{item_id}">Link</a>
+    </li>
+    """
+
+
+@pytest.mark.parametrize(
+    "layout",
+    [
+        "<ul>{exact}<li><div>{marker}</div></li>{loose}</ul>",
+        "<ul>{exact}<div class='srp-river-answer'>{marker}</div>{loose}</ul>",
+        "<ul>{exact}<li><section><p><b>{marker}</b></p></section></li>{loose}</ul>",
+        "<div><ul>{exact}</ul><h3>{marker}</h3><ul>{loose}</ul></div>",
+    ],
+)
+def test_extract_listings_fewer_words_anywhere(layout: str) -> None:
+    # the cutoff follows document order, wherever eBay puts the marker
+    html = layout.format(
+        exact=_item(0) + _item(0) + _item(1),
+        loose=_item(2),
+        marker="Results matching fewer words",
+    )
+
+    assert [listing.url for listing in extract_listings(html)] == [
+        "https://www.ebay.com/itm/1"
+    ]
+
+
+def test_extract_listings_marker_above_the_list() -> None:
+    # with no exact matches eBay can head the whole list with the marker
+    html = f"<div><h2>Results matching fewer words</h2><ul>{_item(0) * 3}</ul></div>"
+
+    assert extract_listings(html) == []
+
+
+def test_extract_listings_mixed_prices() -> None:
+    listings = extract_listings(load_ebay_page("synthetic_sold_mixed_prices.html"))
+
+    # price ranges are skipped, listings without a link keep a null URL
+    assert len(listings) == 50
+    assert sum(listing.url is None for listing in listings) == 10
+
+
+def test_parse_listing_price_with_thousands_separator() -> None:
+    html = """
+    <li class="s-item">
+        <a class="s-item__link" href="http://test.com">
+            <div class="s-item__title"><span>Test Item</span></div>
+        </a>
+        <span class="s-item__price"><span>$1,234.50</span></span>
+    </li>
     """
+    item = LexborHTMLParser(html).css_first("li.s-item")
+
+    assert parse_listing(item) == EbayListing(
+        title="Test Item", price=1234.5, url="http://test.com"
+    )
+
+
+def test_is_robot_check() -> None:
+    assert is_robot_check(b"<title>Robot Check</title>")
+    assert is_robot_check(b"<title>ROBOT check</title>")
+    assert is_robot_check(b"<p>please complete the rObOt ChEcK</p>")
+    assert is_robot_check(b"x" * 64 * 1024 + b"Robot Check")
+    assert not is_robot_check(load_ebay_page("synthetic_sold_full_page.html"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_parse_ebay_listings_in_executor(kind: str) -> None:
+    html = load_ebay_page("synthetic_sold_full_page.html")
+    executor = create_parse_executor(kind, workers=1)
+    try:
+        listings = await parse_ebay_listings(html, executor)
+    finally:
+        executor.shutdown()
+
+    assert listings == extract_listings(html)
+
+
+def test_create_parse_executor_unknown_kind() -> None:
+    with pytest.raises(ValueError):
+        create_parse_executor("fork")
+
+
+def test_listing_key() -> None:
+    assert listing_key(EbayListing("a", 1.0, "https://www.ebay.com/itm/123?x=1")) == (
+        "123"
+    )
+    assert listing_key(EbayListing("a", 1.0, "https://www.ebay.com/itm/slug/456")) == (
+        "456"
+    )
+    assert listing_key(EbayListing("a", 1.0, "http://item/7?x=1")) == "http://item/7"
+    assert listing_key(EbayListing("a", 1.0)) is None
+
+
+def test_listing_batch() -> None:
+    batch = ListingBatch(["a", "bb", "ccc"], [1.0, 2.5, 4.0], ["http://a", None, ""])
+
+    assert len(batch) == 3
+    assert batch[1] == EbayListing("bb", 2.5)
+    assert batch[-1] == EbayListing("ccc", 4.0)
+    assert list(batch[1:]) == [EbayListing("bb", 2.5), EbayListing("ccc", 4.0)]
+    assert batch == [EbayListing("a", 1.0, "http://a"), *batch[1:]]
+    assert batch[5:] == []
+    assert pickle.loads(pickle.dumps(batch)) == batch  # noqa: S301
+    with pytest.raises(IndexError):
+        batch[3]
+    with pytest.raises(ValueError):
+        ListingBatch(["a"], [1.0, 2.0])
+
+
+def test_listing_batch_prices_are_shared() -> None:
+    batch = ListingBatch.from_listings([EbayListing("a", 1.0), EbayListing("b", 2.0)])
+    prices = np.asarray(batch.prices)
+    assert np.shares_memory(prices, np.frombuffer(batch.prices))
+    assert prices.tolist() == [1.0, 2.0]
+
+
+def test_until_known() -> None:
+    listings = [EbayListing(str(i), 1.0, f"http://item/{i}") for i in range(5)]
+
+    assert until_known(listings, None) == (listings, False)
+    assert until_known(listings, {"http://item/3"}) == (listings[:3], True)
+
+
+@pytest.mark.asyncio
+async def test_scrape_ebay_stops_at_known_items() -> None:
+    requested: list[int] = []
 
-    mock_response = MagicMock(spec=httpx.Response)
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    mock_response.raise_for_status = MagicMock()
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("_pgn", "1"))
+        requested.append(page)
+        first = (page - 1) * PAGE_SIZE
+        urls = [f"http://item/{i}" for i in range(first, first + PAGE_SIZE)]
+        return httpx.Response(200, text=_results_page(urls))
 
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    mock_client.__aenter__.return_value.get.return_value = mock_response
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        results = await scrape_ebay(
+            "test", clients=clients, pages=4, concurrency=1, known={"http://item/50"}
+        )
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
-        results = await scrape_ebay("test query")
-        assert len(results) >= 0
-        if results:
-            assert results[0].title == "Test Item"
-            assert results[0].price == 100.0
+    assert requested == [1]
+    assert [listing.url for listing in results] == [
+        f"http://item/{i}" for i in range(50)
+    ]
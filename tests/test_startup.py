@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.getenv("VIDYA_IMPORT_BUDGET_MS", "1000"))
+LAZY_MODULES = ("openai", "numpy", "matplotlib", "pandas")
+
+
+def _import_bot() -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys, vidya.bot; "
+            f"print([m for m in {LAZY_MODULES!r} if m in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _cumulative_ms(importtime_log: str, module: str) -> float:
+    for line in importtime_log.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise AssertionError(f"{module} missing from -X importtime output")
+
+
+def test_bot_import_skips_heavy_dependencies() -> None:
+    result = _import_bot()
+    assert result.stdout.strip() == "[]"
+
+
+def test_bot_import_time_budget() -> None:
+    result = _import_bot()
+    elapsed = _cumulative_ms(result.stderr, "vidya.bot")
+    assert elapsed < IMPORT_BUDGET_MS, (
+        f"import vidya.bot took {elapsed:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+    )
@@ -1,62 +1,186 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
 
 import httpx
+import numpy as np
 import pytest
 
-from vidya.utils import ExchangeRateService, calculate_statistics
+from vidya.clients import HttpClientRegistry
+from vidya.utils import (
+    ExchangeRateService,
+    calculate_statistics,
+    calculate_statistics_batch,
+)
 
 
-@pytest.mark.asyncio
-async def test_get_exchange_rate_success() -> None:
-    mock_rate = 1.35
+def _rate_transport(rate: float, calls: list[httpx.Request]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"rates": {"CAD": rate}})
 
-    mock_response = MagicMock(spec=httpx.Response)
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"rates": {"CAD": mock_rate}}
-    mock_response.raise_for_status = MagicMock()
+    return httpx.MockTransport(handler)
 
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    mock_client.__aenter__.return_value.get.return_value = mock_response
 
-    service = ExchangeRateService()
+@pytest.mark.asyncio
+async def test_get_exchange_rate_success() -> None:
+    mock_rate = 1.35
+    calls: list[httpx.Request] = []
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
+    async with HttpClientRegistry(
+        transport=_rate_transport(mock_rate, calls)
+    ) as clients:
+        service = ExchangeRateService(clients)
         rate = await service.get_rate()
-        assert rate == mock_rate
+
+    assert rate == mock_rate
+    assert calls[0].url.path == "/v4/latest/USD"
 
 
 @pytest.mark.asyncio
 async def test_get_exchange_rate_cache() -> None:
     mock_rate = 1.35
+    calls: list[httpx.Request] = []
 
-    mock_response = MagicMock(spec=httpx.Response)
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"rates": {"CAD": mock_rate}}
-    mock_response.raise_for_status = MagicMock()
+    async with HttpClientRegistry(
+        transport=_rate_transport(mock_rate, calls)
+    ) as clients:
+        service = ExchangeRateService(clients)
+        rate1 = await service.get_rate()
+        rate2 = await service.get_rate()
 
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    mock_client.__aenter__.return_value.get.return_value = mock_response
+    assert rate1 == rate2 == mock_rate
+    assert len(calls) == 1
 
-    service = ExchangeRateService()
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
-        rate1 = await service.get_rate()
-        rate2 = await service.get_rate()
-        assert rate1 == rate2 == mock_rate
-        assert mock_client.__aenter__.return_value.get.call_count == 1
+@pytest.mark.asyncio
+async def test_get_exchange_rate_caches_full_table() -> None:
+    calls: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"rates": {"CAD": 1.35, "EUR": 0.9}})
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        service = ExchangeRateService(clients)
+        assert await service.get_rate(to_currency="CAD") == 1.35
+        assert await service.get_rate(to_currency="EUR") == 0.9
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_exchange_rate_serves_stale_while_refreshing() -> None:
+    now = 0.0
+    rates = iter([1.35, 1.4])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"rates": {"CAD": next(rates)}})
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        service = ExchangeRateService(
+            clients, max_age=60.0, refresh_ahead=10.0, clock=lambda: now
+        )
+        assert await service.get_rate() == 1.35
+
+        now = 55.0
+        assert await service.get_rate() == 1.35
+        await asyncio.gather(*service._background)
+
+        assert await service.get_rate() == 1.4
+        await service.aclose()
 
 
 @pytest.mark.asyncio
-async def test_calculate_statistics() -> None:
+async def test_get_exchange_rate_keeps_stale_table_on_failure() -> None:
+    now = 0.0
+    responses = iter(
+        [httpx.Response(200, json={"rates": {"CAD": 1.35}}), httpx.Response(500)]
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return next(responses)
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        service = ExchangeRateService(clients, max_age=60.0, clock=lambda: now)
+        assert await service.get_rate() == 1.35
+
+        now = 120.0
+        assert await service.get_rate() == 1.35
+        await asyncio.gather(*service._background)
+        assert await service.get_rate() == 1.35
+        await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_exchange_rate_fallback_without_table() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500)
+
+    async with HttpClientRegistry(transport=httpx.MockTransport(handler)) as clients:
+        service = ExchangeRateService(clients)
+        assert await service.get_rate() == 1.4
+
+
+def test_calculate_statistics() -> None:
     prices = [100, 200, 300, 400, 500]
     mock_rate = 1.5
 
-    class MockExchangeService:
-        async def get_rate(self, *args: object, **kwargs: object) -> float:
-            return mock_rate
-
-    stats = await calculate_statistics(prices, MockExchangeService())
+    stats = calculate_statistics(prices, mock_rate)
 
     assert stats.min_price == round(100 * mock_rate, 2)
     assert stats.max_price == round(500 * mock_rate, 2)
     assert stats.total_listings == 5
+    assert stats.mean_price == 450.0
+    assert stats.histogram is None
+
+
+def test_calculate_statistics_matches_numpy_quantiles() -> None:
+    rng = np.random.default_rng(7)
+    prices = rng.uniform(1, 1000, size=1001)
+
+    stats = calculate_statistics(prices, 1.35)
+
+    expected = np.quantile(prices * 1.35, [0.0, 0.25, 0.5, 0.75, 1.0]).round(2)
+    assert [
+        stats.min_price,
+        stats.q1_price,
+        stats.median_price,
+        stats.q3_price,
+        stats.max_price,
+    ] == expected.tolist()
+    assert stats.stddev_price == round(float(np.std(prices * 1.35, ddof=1)), 2)
+
+
+def test_calculate_statistics_trims_outliers() -> None:
+    prices = [10, 11, 12, 13, 14, 15, 1000]
+
+    stats = calculate_statistics(prices, 1.0, trim_outliers=True)
+
+    assert stats.outliers_removed == 1
+    assert stats.total_listings == 6
+    assert stats.max_price == 15.0
+
+
+def test_calculate_statistics_histogram() -> None:
+    stats = calculate_statistics([1, 2, 3, 4], 1.0, histogram_bins=2)
+
+    assert stats.histogram is not None
+    assert stats.histogram.counts == [2, 2]
+    assert stats.histogram.edges == [1.0, 2.5, 4.0]
+
+
+def test_calculate_statistics_empty() -> None:
+    with pytest.raises(ValueError):
+        calculate_statistics([], 1.0)
+
+
+def test_calculate_statistics_batch() -> None:
+    vectors = [[100, 200, 300], [5], [1, 2, 3, 4, 1000]]
+
+    batch = calculate_statistics_batch(vectors, 2.0, trim_outliers=True)
+
+    assert batch == [
+        calculate_statistics(vector, 2.0, trim_outliers=True) for vector in vectors
+    ]
+    assert batch[1].median_price == 10.0
+    assert batch[1].stddev_price == 0.0
+    assert batch[2].outliers_removed == 1
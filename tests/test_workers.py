@@ -0,0 +1,258 @@
+import asyncio
+import functools
+import os
+from multiprocessing.queues import Queue
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from tests.fixtures import load_ebay_page
+from vidya.clients import HttpClientRegistry
+from vidya.config import Settings
+from vidya.metrics import registry
+from vidya.scraper import EbayScraperError, ListingBatch
+from vidya.services import ScrapeServices
+from vidya.workers import (
+    EbayJob,
+    EbayJobResult,
+    Heartbeat,
+    WorkerError,
+    WorkerPool,
+    WorkerUnavailableError,
+    _worker_main,
+    run_job,
+)
+
+
+def echo_worker(index: int, settings: Settings, jobs: Queue, results: Queue) -> None:
+    completed = 0
+    while (message := jobs.get()) is not None:
+        if not isinstance(message, EbayJob):
+            results.put(Heartbeat(index, 0, completed))
+        elif message.query == "crash":
+            os._exit(1)
+        elif message.query == "broken":
+            results.put(EbayJobResult(message.job_id, error="boom"))
+        else:
+            completed += 1
+            sparkline = f"{index}:{message.query}:{message.pages}"
+            results.put(EbayJobResult(message.job_id, sparkline=sparkline))
+
+
+def mock_ebay_worker(
+    index: int, settings: Settings, jobs: Queue, results: Queue
+) -> None:
+    # runs the real worker, only swapping the network for canned responses
+    page = load_ebay_page("synthetic_sold_full_page.html")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "api.exchangerate-api.com":
+            return httpx.Response(200, json={"rates": {"CAD": 1.35}})
+        return httpx.Response(200, content=page)
+
+    transport = httpx.MockTransport(handler)
+    clients = functools.partial(HttpClientRegistry, transport=transport)
+    with patch("vidya.services.HttpClientRegistry", clients):
+        _worker_main(index, settings, jobs, results)
+
+
+@pytest.fixture
+async def pool() -> object:
+    pool = WorkerPool(Settings(), workers=2, drain_timeout=5.0, target=echo_worker)
+    pool.start()
+    yield pool
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_run_job_returns_stats_and_sparkline() -> None:
+    services = ScrapeServices.create(Settings(chart_backend="text"))
+    listings = ListingBatch(["a", "b", "c"], [10.0, 20.0, 30.0], ["", "", ""])
+    with (
+        patch("vidya.workers.scrape_ebay", AsyncMock(return_value=listings)),
+        patch.object(services.exchange, "get_rate", AsyncMock(return_value=1.5)),
+    ):
+        result = await run_job(services, Settings(), EbayJob(7, "widgets"))
+    await services.aclose()
+
+    assert result.job_id == 7
+    assert result.stats.total_listings == 3
+    assert result.stats.median_price == pytest.approx(30.0)
+    assert result.sparkline
+    assert result.chart is None
+    assert result.error is None
+    assert result.expires_in == pytest.approx(300.0, abs=1.0)
+
+
+@pytest.mark.asyncio
+async def test_run_job_refresh_bypasses_cached_listings() -> None:
+    services = ScrapeServices.create(Settings(chart_backend="text"))
+    stale = ListingBatch(["a"], [10.0], [""])
+    fresh = ListingBatch(["a", "b"], [10.0, 20.0], ["", ""])
+    with (
+        patch("vidya.workers.scrape_ebay", AsyncMock(side_effect=[stale, fresh])),
+        patch.object(services.exchange, "get_rate", AsyncMock(return_value=1.0)),
+    ):
+        await run_job(services, Settings(), EbayJob(1, "widgets"))
+        cached = await run_job(services, Settings(), EbayJob(2, "widgets"))
+        refreshed = await run_job(
+            services, Settings(), EbayJob(3, "widgets", refresh=True)
+        )
+    await services.aclose()
+
+    assert cached.stats.total_listings == 1
+    assert refreshed.stats.total_listings == 2
+
+
+@pytest.mark.asyncio
+async def test_run_job_cancelled_speculation_leaves_no_entry() -> None:
+    services = ScrapeServices.create(Settings(chart_backend="text"))
+    listings = ListingBatch(["a"], [10.0], [""])
+    rate_started = asyncio.Event()
+
+    async def slow_rate() -> float:
+        rate_started.set()
+        await asyncio.Event().wait()
+        return 1.0
+
+    with (
+        patch("vidya.workers.scrape_ebay", AsyncMock(return_value=listings)),
+        patch.object(services.exchange, "get_rate", slow_rate),
+    ):
+        job = EbayJob(1, "widgets", speculative=True)
+        task = asyncio.create_task(run_job(services, Settings(), job))
+        await rate_started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await services.aclose()
+
+    assert task.cancelled()
+    assert services.scrape_cache.expires_in("widgets") is None
+    assert not services.scrape_cache.fetching("widgets")
+
+
+@pytest.mark.asyncio
+async def test_run_job_listings_only_skips_stats() -> None:
+    services = ScrapeServices.create(Settings())
+    listings = ListingBatch(["a"], [10.0], [""])
+    get_rate = AsyncMock(return_value=1.0)
+    with (
+        patch("vidya.workers.scrape_ebay", AsyncMock(return_value=listings)),
+        patch.object(services.exchange, "get_rate", get_rate),
+    ):
+        result = await run_job(
+            services, Settings(), EbayJob(1, "widgets", listings_only=True)
+        )
+    await services.aclose()
+
+    assert list(result.listings.prices) == [10.0]
+    assert result.stats is None
+    get_rate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_job_reports_scrape_errors() -> None:
+    services = ScrapeServices.create(Settings())
+    with patch(
+        "vidya.workers.scrape_ebay", AsyncMock(side_effect=EbayScraperError("down"))
+    ):
+        result = await run_job(services, Settings(), EbayJob(1, "widgets"))
+    await services.aclose()
+
+    assert result.scrape_failed is True
+    assert result.error == "down"
+    assert result.stats is None
+
+
+def test_worker_pool_rejects_zero_workers() -> None:
+    with pytest.raises(ValueError, match="at least one worker"):
+        WorkerPool(Settings(), workers=0)
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_routes_queries_to_stable_workers(pool: WorkerPool) -> None:
+    results = await asyncio.gather(
+        pool.submit("Retro Console", pages=2),
+        pool.submit("retro  console", pages=2),
+        pool.submit("vintage camera"),
+    )
+
+    first, second, third = (result.sparkline.split(":") for result in results)
+    assert first[0] == second[0]
+    assert first[1:] == ["Retro Console", "2"]
+    assert third[1:] == ["vintage camera", "1"]
+    assert pool.submitted == pool.completed == 3
+    assert pool.pending == 0
+
+    with pytest.raises(WorkerError, match="boom"):
+        await pool.submit("broken")
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_restarts_crashed_workers(pool: WorkerPool) -> None:
+    crashed = asyncio.create_task(pool.submit("crash"))
+    for _ in range(100):
+        await asyncio.sleep(0.05)
+        if pool.healthy < pool.workers:
+            break
+
+    await pool.check_health()
+
+    with pytest.raises(WorkerError, match="stopped"):
+        await crashed
+    assert pool.restarts == 1
+    result = await pool.submit("crash-free")
+    assert result.sparkline.endswith("crash-free:1")
+    assert pool.healthy == pool.workers
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_drains_and_stops_accepting(pool: WorkerPool) -> None:
+    pending = [asyncio.create_task(pool.submit(f"query {n}")) for n in range(20)]
+    await asyncio.sleep(0)
+
+    await pool.aclose()
+
+    assert all(task.result().error is None for task in pending)
+    assert pool.healthy == 0
+    with pytest.raises(WorkerUnavailableError):
+        await pool.submit("late query")
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_real_jobs_and_exports_state() -> None:
+    fetches = registry.histogram("vidya_stage_seconds", stage="fetch")
+    fetched_before = fetches.count if fetches else 0
+    pool = WorkerPool(
+        Settings(chart_backend="raster"),
+        workers=1,
+        drain_timeout=5.0,
+        target=mock_ebay_worker,
+    )
+    pool.start()
+    try:
+        result = await pool.submit("retro console")
+        assert result.stats.total_listings > 0
+        assert result.chart.startswith(b"\x89PNG")
+        assert pool.expires_in("Retro  Console") == pytest.approx(300.0, abs=5.0)
+        assert pool.expires_in("vintage camera") is None
+
+        refreshed = await pool.submit("retro console", refresh=True)
+        assert refreshed.stats == result.stats
+        listings = await pool.listings("retro console")
+        assert len(listings) == result.stats.total_listings
+
+        await pool.check_health()
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if registry.histogram("vidya_stage_seconds", stage="render"):
+                break
+    finally:
+        await pool.aclose()
+
+    fetches = registry.histogram("vidya_stage_seconds", stage="fetch")
+    assert fetches.count - fetched_before == 2
+    assert registry.histogram("vidya_stage_seconds", stage="parse") is not None
+    assert 'vidya_ebay_requests_total{worker="0"} 2.0' in registry.render_prometheus()
+    assert pool.idle